@@ -0,0 +1,211 @@
+"""Benchmarks for the editor's core operations.
+
+    python benchmarks.py                     # 1K, 1M and 10M files, checked against the baseline
+    python benchmarks.py --sizes 1K,100M,1G  # any sizes; large files take a while to generate
+    python benchmarks.py --save-baseline     # record the current numbers as the new baseline
+    python benchmarks.py --widget            # also time the Tk widget (needs a display, e.g. xvfb-run)
+
+Each run writes a synthetic file of the given size to a temporary directory
+and times opening it, typing into it, searching, replacing every match and
+saving it through the same code the editor uses. A metric more than
+--threshold times slower than the baseline fails the run.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from core import TextBuffer, BufferView
+from history import EditHistory
+from format_runs import FormatRuns
+from highlighter import Highlighter, LogLexer
+from recovery import EditJournal, JournalWriter
+from search_engine import SearchQuery
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua error warning info debug").split()
+# Timings below this many seconds are noise, not regressions
+NOISE_FLOOR = 0.002
+
+
+def parse_size(size):
+    size = size.strip().upper()
+    if size[-1] in UNITS:
+        return int(float(size[:-1]) * UNITS[size[-1]])
+    return int(size)
+
+
+def write_synthetic(path, size, block_size=1 << 20):
+    """Write size bytes of word-like lines; one random block is repeated for speed"""
+    rng = random.Random(size)
+    lines = []
+    length = 0
+    while length < min(size, block_size):
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15)))
+        lines.append(line)
+        length += len(line) + 1
+    block = ("\n".join(lines) + "\n").encode('utf-8')
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            chunk = block[:size - written]
+            f.write(chunk)
+            written += len(chunk)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def bench_file(path, keystrokes=200):
+    results = {}
+    results["open"], buffer = timed(TextBuffer.load, path)
+
+    # The listeners the editor attaches to its Text widget, in the same order
+    history = EditHistory()
+    format_runs = FormatRuns()
+    format_runs.extend(["bold"], "1.0", "1.5")
+    view = BufferView(buffer)
+    highlighter = Highlighter(view, LogLexer())
+    writer = JournalWriter()
+    writer.start()
+    journal = EditJournal(os.path.dirname(path), writer=writer)
+    journal.reset(path, base="file")
+    for listener in (history.record, format_runs.on_edit, highlighter.on_edit, journal.record):
+        buffer.add_listener(listener)
+    view.update_idletasks()
+
+    # Type in the middle of the document; each keystroke includes the idle
+    # work Tk would do before redrawing, and timers run between keystrokes
+    line = len(buffer.lines) // 2 + 1
+    latencies = []
+    for i in range(keystrokes):
+        start = time.perf_counter()
+        buffer.insert(f"{line}.{i}", "x")
+        view.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+        view.update()
+    journal.flush()
+    results["keystroke_p50"] = percentile(latencies, 0.5)
+    results["keystroke_p99"] = percentile(latencies, 0.99)
+
+    results["search"], matches = timed(buffer.search, SearchQuery("error", whole_word=True))
+    history.begin_group("Replace All")
+    results["replace_all"], _ = timed(buffer.replace_all, SearchQuery("warn(ing)", regex=True), r"WARN\1")
+    history.end_group()
+    journal.flush()
+    results["save"], _ = timed(buffer.save, path + ".out")
+    results["matches"] = len(matches)
+
+    highlighter.cancel()
+    journal.discard()
+    writer.flush()
+    return results
+
+
+def bench_widget(path, keystrokes=200):
+    """Keystroke-to-render latency in a real Text widget, or None without a display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"Skipping widget benchmark: {e}")
+        return None
+    try:
+        text = tk.Text(root)
+        text.pack()
+        start = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as f:
+            text.insert("1.0", f.read())
+        root.update()
+        results = {"widget_open": time.perf_counter() - start}
+        text.mark_set("insert", "end-1c linestart")
+        text.see("insert")
+        latencies = []
+        for _ in range(keystrokes):
+            start = time.perf_counter()
+            text.insert("insert", "x")
+            root.update_idletasks()
+            latencies.append(time.perf_counter() - start)
+        results["widget_keystroke_p50"] = percentile(latencies, 0.5)
+        results["widget_keystroke_p99"] = percentile(latencies, 0.99)
+        return results
+    finally:
+        root.destroy()
+
+
+def compare(results, baseline, threshold):
+    """Print each metric against the baseline and return the regressions"""
+    regressions = []
+    for size, metrics in results.items():
+        for name, value in metrics.items():
+            if name == "matches":
+                continue
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                print(f"  {size:>6} {name:<22} {value * 1000:10.2f} ms")
+                continue
+            ratio = value / base if base else float('inf')
+            flag = ""
+            if ratio > threshold and value - base > NOISE_FLOOR:
+                flag = "  REGRESSION"
+                regressions.append((size, name, ratio))
+            print(f"  {size:>6} {name:<22} {value * 1000:10.2f} ms  ({ratio:.2f}x baseline){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the text editor core")
+    parser.add_argument("--sizes", default="1K,1M,10M", help="comma-separated file sizes, e.g. 1K,1M,1G")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown factor that counts as a regression")
+    parser.add_argument("--widget", action="store_true", help="also benchmark the Tk widget")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="text_editor_bench_")
+    results = {}
+    try:
+        for size in args.sizes.split(","):
+            size = size.strip().upper()
+            path = os.path.join(directory, f"bench_{size}.txt")
+            write_synthetic(path, parse_size(size))
+            results[size] = bench_file(path)
+            if args.widget:
+                results[size].update(bench_widget(path) or {})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
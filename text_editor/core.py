@@ -0,0 +1,211 @@
+import time
+
+from file_io import atomic_write
+from documents import load_file
+from rich_format import is_rich_path, encode_document
+from search_engine import SearchJob, make_replacer
+from format_runs import parse_index
+
+
+def text_stats(text):
+    """Return (lines, words, chars) the way the status bar and Word Count show them"""
+    words = len(text.split()) if text else 0
+    return text.count('\n') + 1, words, len(text)
+
+
+class TextBuffer:
+    """The editor's document operations without Tk.
+
+    Text is kept as a list of lines and addressed with Tk-style "line.col"
+    indices, so edits cost O(length of the line) rather than O(document).
+    Listeners get (op, start, end, text) like EditObserver listeners, which
+    lets an EditHistory or EditJournal be attached unchanged. Used by the
+    benchmarks and by anything that needs the editor's behaviour headlessly.
+    """
+
+    def __init__(self, text=""):
+        self.lines = text.split('\n')
+        self.tags = {}
+        self.tag_config = {}
+        self.listeners = []
+
+    @classmethod
+    def load(cls, path):
+        text, tags, tag_config = load_file(path)
+        buffer = cls(text)
+        buffer.tags = tags
+        buffer.tag_config = tag_config
+        return buffer
+
+    def save(self, path):
+        text = self.get()
+        if is_rich_path(path):
+            atomic_write(path, encode_document(text, self.tags, self.tag_config))
+        else:
+            atomic_write(path, text)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, op, start, end, text):
+        for listener in self.listeners:
+            listener(op, start, end, text)
+
+    def index(self, index):
+        """Clamp an index to the buffer the way Tk does; "end" is the last position"""
+        if index == "end":
+            line = len(self.lines)
+            return line, len(self.lines[-1])
+        line, col = parse_index(index)
+        line = max(1, min(line, len(self.lines)))
+        return line, max(0, min(col, len(self.lines[line - 1])))
+
+    def get(self, start="1.0", end="end"):
+        start_line, start_col = self.index(start)
+        end_line, end_col = self.index(end)
+        if (start_line, start_col) >= (end_line, end_col):
+            return ""
+        if start_line == end_line:
+            return self.lines[start_line - 1][start_col:end_col]
+        parts = [self.lines[start_line - 1][start_col:]]
+        parts.extend(self.lines[start_line:end_line - 1])
+        parts.append(self.lines[end_line - 1][:end_col])
+        return '\n'.join(parts)
+
+    def insert(self, index, text):
+        line, col = self.index(index)
+        current = self.lines[line - 1]
+        new_lines = text.split('\n')
+        new_lines[0] = current[:col] + new_lines[0]
+        end_col = len(new_lines[-1])
+        new_lines[-1] += current[col:]
+        self.lines[line - 1:line] = new_lines
+        end = f"{line + len(new_lines) - 1}.{end_col}"
+        self._notify("insert", f"{line}.{col}", end, text)
+        return end
+
+    def delete(self, start, end):
+        start_line, start_col = self.index(start)
+        end_line, end_col = self.index(end)
+        if (start_line, start_col) >= (end_line, end_col):
+            return
+        text = self.get(f"{start_line}.{start_col}", f"{end_line}.{end_col}")
+        merged = self.lines[start_line - 1][:start_col] + self.lines[end_line - 1][end_col:]
+        self.lines[start_line - 1:end_line] = [merged]
+        self._notify("delete", f"{start_line}.{start_col}", f"{end_line}.{end_col}", text)
+
+    def search(self, query):
+        """Return every match of a SearchQuery as (start line, start col, end line, end col)"""
+        job = SearchJob(self.get(), query.compile())
+        # Run on this thread; the job only needs a thread when there is a UI to keep alive
+        job.run()
+        matches = []
+        for batch in iter(job.results.get, None):
+            matches.extend(batch)
+        return matches
+
+    def replace(self, start, end, text):
+        """Replace start..end with text, as a delete then an insert like Tk's replace"""
+        self.delete(start, end)
+        return self.insert(start, text)
+
+    def replace_all(self, query, replacement):
+        """Replace every match of query and return how many were replaced.
+
+        As in the editor, the matches and their replacement text come from a
+        SearchJob and are applied from the end of the buffer backwards, so
+        listeners see one delete and one insert per match.
+        """
+        job = SearchJob(self.get(), query.compile(), replacer=make_replacer(replacement, query.regex))
+        job.run()
+        spans = []
+        for batch in iter(job.results.get, None):
+            spans.extend(batch)
+        if job.error is not None:
+            raise job.error
+        for start_line, start_col, end_line, end_col, text in reversed(spans):
+            self.replace(f"{start_line}.{start_col}", f"{end_line}.{end_col}", text)
+        return len(spans)
+
+    def stats(self):
+        return text_stats(self.get())
+
+
+class BufferView:
+    """The Text widget calls a Highlighter makes, answered from a TextBuffer.
+
+    Lets the syntax highlighter run headlessly, e.g. in the benchmarks. The
+    view shows the first `height` lines, one line per unit of height. Tags
+    are not drawn, so tag calls do nothing. Callbacks queue up like Tk's:
+    update_idletasks() runs the after_idle ones and update() also runs the
+    after() timers that are due.
+    """
+
+    def __init__(self, buffer, height=50):
+        self.buffer = buffer
+        self.height = height
+        self.idle = {}
+        self.timers = {}
+        self.next_id = 0
+
+    def _resolve(self, index):
+        if index in ("end", "end-1c"):
+            return "end"
+        if index.startswith("@"):
+            y = int(index.split(',')[1])
+            return f"{min(1 + y, len(self.buffer.lines))}.0"
+        line, col = index.split('.')
+        if col == "end":
+            line = max(1, min(int(line), len(self.buffer.lines)))
+            return f"{line}.{len(self.buffer.lines[line - 1])}"
+        return index
+
+    def index(self, index):
+        return "{}.{}".format(*self.buffer.index(self._resolve(index)))
+
+    def get(self, start, end):
+        return self.buffer.get(self._resolve(start), self._resolve(end))
+
+    def winfo_height(self):
+        return self.height
+
+    def tag_configure(self, tag, **options):
+        pass
+
+    def tag_lower(self, tag):
+        pass
+
+    def tag_add(self, tag, *indices):
+        pass
+
+    def tag_remove(self, tag, start, end=None):
+        pass
+
+    def after(self, delay, callback, *args):
+        self.next_id += 1
+        self.timers[self.next_id] = (time.perf_counter() + delay / 1000, callback, args)
+        return self.next_id
+
+    def after_idle(self, callback, *args):
+        self.next_id += 1
+        self.idle[self.next_id] = (callback, args)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.idle.pop(after_id, None)
+        self.timers.pop(after_id, None)
+
+    def update_idletasks(self):
+        while self.idle:
+            after_id = next(iter(self.idle))
+            callback, args = self.idle.pop(after_id)
+            callback(*args)
+
+    def update(self):
+        self.update_idletasks()
+        now = time.perf_counter()
+        for after_id, (due, _, _) in list(self.timers.items()):
+            if due <= now and after_id in self.timers:
+                _, callback, args = self.timers.pop(after_id)
+                callback(*args)
+        self.update_idletasks()
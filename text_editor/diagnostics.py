@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import tkinter
+from collections import deque
+
+_original_call = tkinter.CallWrapper.__call__
+_active = []
+
+
+def _traced_call(wrapper, *args):
+    # Every Python callback Tk makes (bindings, commands, after) comes through here
+    if not _active:
+        return _original_call(wrapper, *args)
+    start = time.perf_counter()
+    try:
+        return _original_call(wrapper, *args)
+    finally:
+        for diagnostics in _active:
+            diagnostics.record_callback(wrapper.func, start, time.perf_counter())
+
+
+def callback_name(func):
+    """Name a Tk callback, looking through the closure after() wraps it in"""
+    kind = "callback"
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and func.__closure__:
+        cells = dict(zip(code.co_freevars, func.__closure__))
+        if "func" in cells:
+            func = cells["func"].cell_contents
+            kind = "after"
+    func = getattr(func, "__func__", func)
+    return getattr(func, "__qualname__", repr(func)), kind
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Diagnostics:
+    """Record how long the UI thread spends in each callback.
+
+    While running, every event handler and after() callback is timed, a
+    heartbeat timer measures how late the main loop gets to it (a stall)
+    and keystroke-to-render latency is sampled. Events are kept in a ring
+    buffer and can be written out in Chrome's trace event format, for
+    chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, root, heartbeat_interval=50, stall_threshold=0.1, max_events=100000):
+        self.root = root
+        self.heartbeat_interval = heartbeat_interval
+        self.stall_threshold = stall_threshold
+        self.events = deque(maxlen=max_events)
+        self.latencies = deque(maxlen=1000)
+        self.worst_stall = 0.0
+        self.heartbeat_id = None
+        self.heartbeat_due = None
+        self.epoch = time.perf_counter()
+        # Installed once; costs one list check per callback while not running
+        tkinter.CallWrapper.__call__ = _traced_call
+
+    @property
+    def running(self):
+        return self in _active
+
+    def start(self):
+        if self.running:
+            return
+        self.events.clear()
+        self.latencies.clear()
+        self.worst_stall = 0.0
+        # The time spent stopped is not a stall
+        self.heartbeat_due = None
+        _active.append(self)
+        self._heartbeat()
+
+    def stop(self):
+        if not self.running:
+            return
+        _active.remove(self)
+        if self.heartbeat_id:
+            self.root.after_cancel(self.heartbeat_id)
+            self.heartbeat_id = None
+
+    def _event(self, name, category, start, end):
+        self.events.append((name, category, start, end - start))
+
+    def record_callback(self, func, start, end):
+        name, kind = callback_name(func)
+        self._event(name, kind, start, end)
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        if self.heartbeat_due is not None:
+            late = now - self.heartbeat_due
+            if late > self.stall_threshold:
+                self._event("main loop stall", "stall", self.heartbeat_due, now)
+                self.worst_stall = max(self.worst_stall, late)
+        self.heartbeat_due = now + self.heartbeat_interval / 1000
+        self.heartbeat_id = self.root.after(self.heartbeat_interval, self._heartbeat)
+
+    def key_pressed(self):
+        """Call from the key handler; the sample ends once Tk has redrawn"""
+        if not self.running:
+            return
+        start = time.perf_counter()
+        # The widget schedules its redraw as an idle handler while handling
+        # the key, so an idle callback queued from an idle callback runs after it
+        self.root.after_idle(self.root.after_idle, self._key_rendered, start)
+
+    def _key_rendered(self, start):
+        end = time.perf_counter()
+        self.latencies.append(end - start)
+        self._event("keystroke to render", "keystroke", start, end)
+
+    def summary(self):
+        """Short text for the status bar"""
+        p50 = percentile(self.latencies, 0.5) * 1000
+        p99 = percentile(self.latencies, 0.99) * 1000
+        return f"Key p50 {p50:.1f} ms p99 {p99:.1f} ms | Worst stall {self.worst_stall * 1000:.0f} ms"
+
+    def write_trace(self, path):
+        pid = os.getpid()
+        trace = [{
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.epoch) * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": 1,
+        } for name, category, start, duration in self.events]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,94 @@
+import os
+import zlib
+
+from history import EditHistory
+from recovery import EditJournal
+from rich_format import is_rich_file, read_document, read_text, encode_document, decode_document
+
+
+def load_file(path):
+    """Return (text, {tag: [indices]}, tag_config) for a plain or formatted file"""
+    if is_rich_file(path):
+        return read_document(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read(), {}, {}
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Document:
+    """One tab of the editor.
+
+    Only the active document lives in the Text widget. When another tab is
+    selected the document is parked: if it matches its file on disk only the
+    path and view state are kept and the text is read back on activation;
+    otherwise its text and tags are kept as a compressed .tdoc blob. The undo
+    history and recovery journal belong to the document and survive switching;
+    a parked document's history is moved to its spill file, so it costs no
+    memory until an undo reads it back.
+    """
+
+    def __init__(self, file_path=None, history_memory=8 << 20, journal_writer=None):
+        self.file_path = file_path
+        self.history = EditHistory(max_memory=history_memory)
+        self.journal = EditJournal(writer=journal_writer)
+        self.syntax = "None"
+        self.cursor = "1.0"
+        self.yview = 0.0
+        self.modified = False
+        self.stored = None
+        self.stamp = None
+        # The (empty) tab bar page that stands for this document
+        self.tab = None
+
+    @property
+    def title(self):
+        name = os.path.basename(self.file_path) if self.file_path else "Untitled"
+        return f"*{name}" if self.modified else name
+
+    def same_file(self, path):
+        return bool(self.file_path) and os.path.abspath(self.file_path) == os.path.abspath(path)
+
+    def park(self, modified, tag_ranges, tag_config, get_text, reloadable=True):
+        """Drop the live text, keeping only what is needed to bring it back.
+
+        get_text is only called when the text cannot simply be read back
+        from the file, so switching away from a large unmodified file is cheap.
+        """
+        stamp = file_stamp(self.file_path) if self.file_path else None
+        stored = None
+        if not reloadable or modified or tag_ranges or stamp is None:
+            stored = zlib.compress(encode_document(get_text(), tag_ranges, tag_config), 1)
+        # Nothing changes until the text is safely stored, so a failure leaves the document active
+        self.modified = modified
+        self.stamp = stamp
+        self.stored = stored
+        self.history.spill_all()
+
+    def unpark(self):
+        """Return (text, tags, tag_config) to load back into the widget.
+
+        If the file changed on disk while it was parked the undo history no
+        longer applies to what is read back, so it is cleared.
+        """
+        if self.stored is not None:
+            text, tags, tag_config = decode_document(zlib.decompress(self.stored))
+            self.stored = None
+            return text, tags, tag_config
+        if not self.file_path:
+            return "", {}, {}
+        if file_stamp(self.file_path) != self.stamp:
+            self.history.clear()
+        return load_file(self.file_path)
+
+    def text(self):
+        """The text of a parked document"""
+        if self.stored is not None:
+            return decode_document(zlib.decompress(self.stored))[0]
+        return read_text(self.file_path) if self.file_path else ""
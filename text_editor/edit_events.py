@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+
+
+class EditObserver:
+    """Report every change made to a Tk Text widget.
+
+    The widget's Tcl command is renamed and replaced with a proxy, so edits
+    from key bindings, paste, undo and our own code all pass through here.
+    Listeners are called as listener(op, start, end, text) after the change,
+    where op is "insert" or "delete", start/end are numeric "line.col" indices
+    (for a delete, as they were before the text was removed) and text is the
+    inserted or deleted text.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.listeners = []
+        self.suspended = 0
+        self._tk = widget.tk
+        self._orig = widget._w + "_orig"
+        self._tk.call("rename", widget._w, self._orig)
+        self._tk.createcommand(widget._w, self._proxy)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    @contextmanager
+    def suspend(self):
+        """Make edits without notifying listeners, e.g. while loading a file"""
+        self.suspended += 1
+        try:
+            yield
+        finally:
+            self.suspended -= 1
+
+    def _call(self, *args):
+        return self._tk.call(self._orig, *args)
+
+    def _index(self, index):
+        return str(self._call("index", index))
+
+    def _compare(self, index1, op, index2):
+        return self._tk.getboolean(self._call("compare", index1, op, index2))
+
+    def _get(self, start, end):
+        return str(self._call("get", start, end))
+
+    def _notify(self, op, start, end, text):
+        if self.suspended or not text:
+            return
+        for listener in list(self.listeners):
+            listener(op, start, end, text)
+
+    def _insert_index(self, index):
+        index = self._index(index)
+        # Text inserted at "end" really goes in before the final newline
+        if self._compare(index, "==", "end"):
+            index = self._index("end-1c")
+        return index
+
+    def _delete_range(self, index1, index2=None):
+        start = self._index(index1)
+        end = self._index(index2) if index2 is not None else self._index(f"{start}+1c")
+        if self._compare(end, ">", "end-1c"):
+            end = self._index("end-1c")
+        return start, end
+
+    def _proxy(self, command, *args):
+        if self.suspended or command not in ("insert", "delete", "replace") or not args:
+            return self._call(command, *args)
+        # Tk's bindings (BackSpace, paste) still call a disabled widget, which ignores them
+        if str(self._call("cget", "-state")) == "disabled":
+            return self._call(command, *args)
+
+        if command == "insert":
+            start = self._insert_index(args[0])
+            result = self._call(command, *args)
+            text = "".join(str(chars) for chars in args[1::2])
+            self._notify("insert", start, self._index(f"{start}+{len(text)}c"), text)
+            return result
+
+        if command == "delete":
+            start, end = self._delete_range(*args[:2])
+            text = self._get(start, end)
+            result = self._call(command, *args)
+            self._notify("delete", start, end, text)
+            return result
+
+        # replace index1 index2 chars ?tagList chars tagList ...?
+        start, end = self._delete_range(args[0], args[1])
+        old_text = self._get(start, end)
+        result = self._call(command, *args)
+        text = "".join(str(chars) for chars in args[2::2])
+        self._notify("delete", start, end, old_text)
+        self._notify("insert", start, self._index(f"{start}+{len(text)}c"), text)
+        return result
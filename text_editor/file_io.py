@@ -0,0 +1,130 @@
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
+
+
+def encode_text(text, encoding='utf-8'):
+    """Encode buffer text the way a text-mode file write would"""
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode(encoding)
+
+
+def current_umask():
+    # Setting the umask is the only portable way to read it
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Read once at import, on the main thread: os.umask() is process-wide and
+# changing it on the save thread could race with other threads creating files
+UMASK = current_umask()
+
+
+def fsync_directory(directory):
+    """Make a rename durable; not possible (or needed) on Windows"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, encoding='utf-8'):
+    """Write data to path so that readers see either the old or the new file.
+
+    The data goes to a temporary file in the same directory, which is fsynced
+    and then renamed over the target. A crash mid-write leaves the original intact.
+    """
+    if isinstance(data, str):
+        data = encode_text(data, encoding)
+    # Write through a symlink to its target rather than replacing the link
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; give it the mode the file had, or the
+        # mode open() would have given a new file
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+class SaveWorker(threading.Thread):
+    """Write files in the background, one at a time.
+
+    Saves queued for the same path before the worker reaches them are
+    coalesced: only the latest data is written and every caller gets the
+    same Future back.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self._pending = {}
+        self._order = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def submit(self, path, data, encoding='utf-8'):
+        """Queue data to be written to path and return a Future for the result.
+
+        data may be a callable, which is called on the worker to produce the
+        text or bytes so that expensive serialization stays off the UI thread.
+        """
+        path = os.path.realpath(path)
+        with self._lock:
+            self._idle.clear()
+            if path in self._pending:
+                future, _, _ = self._pending[path]
+                self._pending[path] = (future, data, encoding)
+                return future
+            future = Future()
+            self._pending[path] = (future, data, encoding)
+        self._order.put(path)
+        return future
+
+    def pending(self, path):
+        with self._lock:
+            return os.path.realpath(path) in self._pending
+
+    def flush(self, timeout=None):
+        """Block until every queued save has been written"""
+        return self._idle.wait(timeout)
+
+    def run(self):
+        while True:
+            path = self._order.get()
+            with self._lock:
+                future, data, encoding = self._pending.pop(path)
+            if future.set_running_or_notify_cancel():
+                try:
+                    if callable(data):
+                        data = data()
+                    atomic_write(path, data, encoding)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(path)
+            with self._lock:
+                if not self._pending:
+                    self._idle.set()
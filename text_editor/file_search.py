@@ -0,0 +1,122 @@
+import os
+import re
+import mmap
+import queue
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def split_globs(patterns):
+    """Split a ';' or ',' separated list of glob patterns"""
+    return [p.strip() for p in re.split(r'[;,]', patterns or '') if p.strip()]
+
+
+def is_binary(data):
+    """Treat anything with a NUL byte in its first block as binary"""
+    return b'\0' in data[:8192]
+
+
+def scan_file(path, regex, max_results=1000, preview_length=200):
+    """Return (path, line_number, preview) for every line of path matching regex.
+
+    The file is memory-mapped rather than read, so only the pages the regex
+    touches are loaded. Binary and empty files yield no results.
+    """
+    results = []
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return results
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if is_binary(mm[:8192]):
+                return results
+            line_number = 1
+            counted = 0
+            match = regex.search(mm)
+            while match and len(results) < max_results:
+                start = match.start()
+                line_start = mm.rfind(b'\n', 0, start) + 1
+                line_end = mm.find(b'\n', start)
+                if line_end == -1:
+                    line_end = size
+                line_number += mm[counted:line_start].count(b'\n')
+                counted = line_start
+                preview = mm[line_start:min(line_end, line_start + preview_length)]
+                results.append((path, line_number, preview.decode('utf-8', 'replace').strip()))
+                # Report each line once, then carry on after it
+                if line_end >= size:
+                    break
+                match = regex.search(mm, line_end + 1)
+    return results
+
+
+class FileSearch(threading.Thread):
+    """Search every matching file under a directory using a pool of worker threads.
+
+    Results are streamed onto `results` as lists of (path, line, preview) tuples,
+    one list per file with matches; None marks the end of the search.
+    """
+
+    def __init__(self, root_dir, regex, include='*', exclude='', max_workers=None):
+        super().__init__(daemon=True)
+        self.root_dir = root_dir
+        self.regex = regex
+        self.include = split_globs(include) or ['*']
+        self.exclude = split_globs(exclude)
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 4)
+        self.results = queue.Queue()
+        self.files_scanned = 0
+        self.errors = 0
+        self.finished = False
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _excluded(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude)
+
+    def _included(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.include)
+
+    def iter_files(self):
+        for dirpath, dirnames, filenames in os.walk(self.root_dir):
+            if self.cancelled:
+                return
+            dirnames[:] = sorted(d for d in dirnames if not self._excluded(d))
+            for name in sorted(filenames):
+                if self._included(name) and not self._excluded(name):
+                    yield os.path.join(dirpath, name)
+
+    def _scan(self, path):
+        if self.cancelled:
+            return
+        try:
+            matches = scan_file(path, self.regex)
+        except (OSError, ValueError):
+            self.errors += 1
+            return
+        self.files_scanned += 1
+        if matches and not self.cancelled:
+            self.results.put(matches)
+
+    def run(self):
+        # Bound the number of queued files so huge trees don't pile up futures
+        slots = threading.BoundedSemaphore(self.max_workers * 4)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for path in self.iter_files():
+                    slots.acquire()
+                    if self.cancelled:
+                        slots.release()
+                        break
+                    future = executor.submit(self._scan, path)
+                    future.add_done_callback(lambda f: slots.release())
+        finally:
+            self.finished = True
+            self.results.put(None)
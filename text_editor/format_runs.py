@@ -0,0 +1,129 @@
+from bisect import bisect_left, bisect_right
+
+
+def parse_index(index):
+    line, col = str(index).split('.')
+    return int(line), int(col)
+
+
+def shift_for_insert(pos, start, end):
+    """Where pos ends up after text spanning start..end is inserted at start"""
+    if pos < start:
+        return pos
+    if pos[0] == start[0]:
+        return end[0], end[1] + pos[1] - start[1]
+    return pos[0] + end[0] - start[0], pos[1]
+
+
+def shift_for_delete(pos, start, end):
+    """Where pos ends up after the text between start and end is deleted"""
+    if pos <= start:
+        return pos
+    if pos <= end:
+        return start
+    if pos[0] == end[0]:
+        return start[0], start[1] + pos[1] - end[1]
+    return pos[0] - (end[0] - start[0]), pos[1]
+
+
+class RunList:
+    """Sorted, non-overlapping [start, end) runs of (line, col) positions.
+
+    Adding a run merges it with any run it overlaps or touches and returns
+    just the pieces that were not covered before, so the caller only has to
+    push that delta to the widget. Runs move with the text on insert/delete.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def add(self, start, end):
+        if start >= end:
+            return []
+        # Runs that overlap or touch [start, end)
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+
+        delta = []
+        cursor = start
+        for run_start, run_end in zip(self.starts[lo:hi], self.ends[lo:hi]):
+            if run_start > cursor:
+                delta.append((cursor, min(run_start, end)))
+            cursor = max(cursor, run_end)
+        if cursor < end:
+            delta.append((cursor, end))
+
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+        return delta
+
+    def covers(self, pos):
+        i = bisect_right(self.starts, pos) - 1
+        return i >= 0 and pos < self.ends[i]
+
+    def clear(self):
+        self.starts = []
+        self.ends = []
+
+    def shift_insert(self, start, end):
+        # Only runs at or after the insertion point move; a run ending exactly
+        # there stays put so typing at its end can extend it
+        i = bisect_left(self.ends, start)
+        if i == len(self.ends):
+            return
+        if self.ends[i] == start:
+            i += 1
+        for j in range(i, len(self.starts)):
+            self.starts[j] = shift_for_insert(self.starts[j], start, end)
+            self.ends[j] = shift_for_insert(self.ends[j], start, end)
+
+    def shift_delete(self, start, end):
+        i = bisect_right(self.ends, start)
+        for j in range(i, len(self.starts)):
+            self.starts[j] = shift_for_delete(self.starts[j], start, end)
+            self.ends[j] = shift_for_delete(self.ends[j], start, end)
+        # Drop runs the delete emptied out
+        kept = [(s, e) for s, e in zip(self.starts[i:], self.ends[i:]) if s < e]
+        self.starts[i:] = [s for s, _ in kept]
+        self.ends[i:] = [e for _, e in kept]
+
+
+class FormatRuns:
+    """Track the text typed while formatting is active, one RunList per tag"""
+
+    def __init__(self):
+        self.runs = {}
+
+    def clear(self, tag=None):
+        if tag is None:
+            self.runs.clear()
+        else:
+            self.runs.pop(tag, None)
+
+    def on_edit(self, op, start, end, text):
+        start, end = parse_index(start), parse_index(end)
+        for runs in self.runs.values():
+            if op == "insert":
+                runs.shift_insert(start, end)
+            else:
+                runs.shift_delete(start, end)
+
+    def extend(self, tags, start, end):
+        """Cover start..end with tags and return {tag: [(start, end), ...]} still to apply"""
+        start, end = parse_index(start), parse_index(end)
+        delta = {}
+        for tag in tags:
+            added = self.runs.setdefault(tag, RunList()).add(start, end)
+            if added:
+                delta[tag] = added
+        return delta
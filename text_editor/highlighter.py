@@ -0,0 +1,360 @@
+import re
+import os
+import time
+import keyword
+import builtins
+
+# Tag name -> Text tag options for every token type a lexer can produce
+TOKEN_STYLES = {
+    "syn_keyword": {"foreground": "#0000cc"},
+    "syn_builtin": {"foreground": "#7a00cc"},
+    "syn_definition": {"foreground": "#006680"},
+    "syn_decorator": {"foreground": "#aa5500"},
+    "syn_string": {"foreground": "#008000"},
+    "syn_number": {"foreground": "#aa5500"},
+    "syn_comment": {"foreground": "#808080"},
+    "syn_key": {"foreground": "#800000"},
+    "syn_literal": {"foreground": "#0000cc"},
+    "syn_heading": {"foreground": "#004080"},
+    "syn_strong": {"foreground": "#202020"},
+    "syn_emphasis": {"foreground": "#505050"},
+    "syn_code": {"foreground": "#8b0000", "background": "#f4f4f4"},
+    "syn_link": {"foreground": "#0066cc", "underline": True},
+    "syn_timestamp": {"foreground": "#808080"},
+    "syn_error": {"foreground": "#cc0000"},
+    "syn_warning": {"foreground": "#b36b00"},
+    "syn_info": {"foreground": "#0055aa"},
+    "syn_debug": {"foreground": "#888888"},
+}
+TOKEN_TAGS = tuple(TOKEN_STYLES)
+
+
+class Lexer:
+    """Tokenize one line at a time, threading a state value between lines.
+
+    lex_line(line, state) returns ([(tag, start_col, end_col), ...], end_state).
+    States must be comparable with ==, which is how re-lexing after an edit
+    knows it has converged with what was there before.
+    """
+
+    name = "Plain"
+    extensions = ()
+    initial_state = None
+
+    def lex_line(self, line, state):
+        return [], state
+
+
+class PythonLexer(Lexer):
+    name = "Python"
+    extensions = (".py", ".pyw", ".pyi")
+
+    keywords = set(keyword.kwlist) | set(getattr(keyword, "softkwlist", ()))
+    builtin_names = set(dir(builtins))
+    token_re = re.compile(r"""
+        (?P<comment>\#.*)
+        |(?P<string>[rbuf]{0,2}(?:'''|\"\"\"|'(?:\\.|[^'\\])*'?|"(?:\\.|[^"\\])*"?))
+        |(?P<decorator>@[\w.]+)
+        |(?P<number>\b(?:0[xob][\da-f_]+|\d[\d_]*\.?[\d_]*(?:e[+-]?\d+)?j?)\b)
+        |(?P<name>\b[^\W\d]\w*\b)
+    """, re.VERBOSE | re.IGNORECASE)
+
+    def lex_line(self, line, state):
+        tokens = []
+        pos = 0
+        if state:
+            # Inside a triple-quoted string carried over from a previous line
+            close = line.find(state)
+            if close == -1:
+                return [("syn_string", 0, len(line))], state
+            pos = close + 3
+            tokens.append(("syn_string", 0, pos))
+            state = None
+
+        previous = None
+        for match in self.token_re.finditer(line, pos):
+            if match.start() < pos:
+                continue
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == "string":
+                text = match.group()
+                quote = text.lstrip("rRbBuUfF")[:3]
+                if quote in ('"""', "'''"):
+                    close = line.find(quote, end)
+                    if close == -1:
+                        tokens.append(("syn_string", start, len(line)))
+                        return tokens, quote
+                    end = close + 3
+                tokens.append(("syn_string", start, end))
+            elif kind == "name":
+                name = match.group()
+                if previous in ("def", "class"):
+                    tokens.append(("syn_definition", start, end))
+                elif name in self.keywords:
+                    tokens.append(("syn_keyword", start, end))
+                elif name in self.builtin_names:
+                    tokens.append(("syn_builtin", start, end))
+                previous = name
+                pos = end
+                continue
+            else:
+                tokens.append((f"syn_{kind}", start, end))
+            previous = None
+            pos = end
+        return tokens, None
+
+
+class JSONLexer(Lexer):
+    name = "JSON"
+    extensions = (".json", ".jsonl", ".geojson")
+
+    token_re = re.compile(r"""
+        (?P<string>"(?:\\.|[^"\\])*"?)(?P<colon>\s*:)?
+        |(?P<number>-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b)
+        |(?P<literal>\b(?:true|false|null)\b)
+    """, re.VERBOSE)
+
+    def lex_line(self, line, state):
+        tokens = []
+        for match in self.token_re.finditer(line):
+            if match.group("string") is not None:
+                tag = "syn_key" if match.group("colon") else "syn_string"
+                tokens.append((tag, match.start("string"), match.end("string")))
+            else:
+                tokens.append((f"syn_{match.lastgroup}", match.start(), match.end()))
+        return tokens, None
+
+
+class MarkdownLexer(Lexer):
+    name = "Markdown"
+    extensions = (".md", ".markdown", ".mdown")
+
+    fence_re = re.compile(r"^\s*(```|~~~)")
+    heading_re = re.compile(r"^#{1,6}\s")
+    quote_re = re.compile(r"^\s*>")
+    bullet_re = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s")
+    inline_re = re.compile(r"""
+        (?P<code>`[^`]+`)
+        |(?P<strong>\*\*[^*]+\*\*|__[^_]+__)
+        |(?P<emphasis>\*[^*\s][^*]*\*|\b_[^_\s][^_]*_\b)
+        |(?P<link>!?\[[^\]]*\]\([^)]*\))
+    """, re.VERBOSE)
+
+    def lex_line(self, line, state):
+        fence = self.fence_re.match(line)
+        if state:
+            # Inside a fenced code block until the matching fence
+            if fence and fence.group(1) == state:
+                return [("syn_code", 0, len(line))], None
+            return [("syn_code", 0, len(line))], state
+        if fence:
+            return [("syn_code", 0, len(line))], fence.group(1)
+        if self.heading_re.match(line):
+            return [("syn_heading", 0, len(line))], None
+        if self.quote_re.match(line):
+            return [("syn_comment", 0, len(line))], None
+
+        tokens = []
+        bullet = self.bullet_re.match(line)
+        if bullet:
+            tokens.append(("syn_keyword", 0, bullet.end()))
+        for match in self.inline_re.finditer(line):
+            tokens.append((f"syn_{match.lastgroup}", match.start(), match.end()))
+        return tokens, None
+
+
+class LogLexer(Lexer):
+    name = "Log"
+    extensions = (".log", ".out", ".err")
+
+    levels = [
+        ("syn_error", re.compile(r"\b(?:ERROR|ERR|FATAL|CRITICAL|SEVERE|PANIC)\b")),
+        ("syn_warning", re.compile(r"\b(?:WARN|WARNING)\b")),
+        ("syn_info", re.compile(r"\b(?:INFO|NOTICE)\b")),
+        ("syn_debug", re.compile(r"\b(?:DEBUG|TRACE|FINE|VERBOSE)\b")),
+    ]
+    timestamp_re = re.compile(
+        r"^\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\]?"
+        r"|^\[?\w{3}\s+\d{1,2} \d{2}:\d{2}:\d{2}\]?"
+    )
+
+    def lex_line(self, line, state):
+        tokens = []
+        # The first level word found decides the color of the whole line
+        head = line[:200]
+        for tag, pattern in self.levels:
+            if pattern.search(head):
+                tokens.append((tag, 0, len(line)))
+                break
+        stamp = self.timestamp_re.match(line)
+        if stamp:
+            tokens.append(("syn_timestamp", 0, stamp.end()))
+        return tokens, None
+
+
+LEXERS = {lexer.name: lexer for lexer in (PythonLexer, JSONLexer, MarkdownLexer, LogLexer)}
+
+
+def lexer_for_filename(path):
+    """Pick a lexer class by file extension, or None for plain text"""
+    if not path:
+        return None
+    extension = os.path.splitext(path)[1].lower()
+    for lexer in LEXERS.values():
+        if extension in lexer.extensions:
+            return lexer
+    return None
+
+
+_UNKNOWN = object()
+
+
+class Highlighter:
+    """Incrementally apply a lexer's tokens to a Text widget as tags.
+
+    states[i] is the lexer state at the end of line i + 1. Lines up to
+    valid_upto are known to be correctly tagged. After an edit only the lines
+    from the change onward are re-lexed, stopping as soon as a line ends in
+    the same state it had before the edit. Work runs in short `after` slices,
+    and the visible lines are always tagged first.
+    """
+
+    def __init__(self, widget, lexer, time_slice=0.008):
+        self.widget = widget
+        self.lexer = lexer
+        self.time_slice = time_slice
+        self.states = []
+        self.valid_upto = 0
+        self.lexed_upto = 0
+        self.dirty_end = 0
+        self.viewport_done = False
+        self.after_id = None
+        for tag, options in TOKEN_STYLES.items():
+            widget.tag_configure(tag, **options)
+            # User formatting and the selection draw over syntax colors
+            widget.tag_lower(tag)
+        self.reset()
+
+    def line_count(self):
+        return int(self.widget.index("end-1c").split('.')[0])
+
+    def reset(self):
+        """Re-lex the whole buffer, e.g. after loading a file"""
+        self.states = [_UNKNOWN] * self.line_count()
+        self.valid_upto = 0
+        self.lexed_upto = 0
+        self.dirty_end = 0
+        self.schedule()
+
+    def clear(self):
+        self.cancel()
+        for tag in TOKEN_TAGS:
+            self.widget.tag_remove(tag, "1.0", "end")
+
+    def cancel(self):
+        if self.after_id:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
+    def schedule(self, delay=None):
+        self.viewport_done = False
+        if self.after_id:
+            return
+        if delay is None:
+            self.after_id = self.widget.after_idle(self._run)
+        else:
+            self.after_id = self.widget.after(delay, self._run)
+
+    def on_edit(self, op, start, end, text):
+        start_line = int(start.split('.')[0])
+        end_line = int(end.split('.')[0])
+        lines = end_line - start_line
+        if op == "insert":
+            self.states[start_line:start_line] = [_UNKNOWN] * lines
+            dirty_end = end_line
+        else:
+            # The merged line ends where the deleted range did, so it keeps that line's state
+            del self.states[start_line - 1:end_line - 1]
+            dirty_end = start_line
+            lines = -lines
+        if self.lexed_upto > start_line:
+            self.lexed_upto = max(start_line, self.lexed_upto + lines)
+        if self.valid_upto >= start_line:
+            self.dirty_end = max(dirty_end, self.dirty_end + lines)
+        else:
+            self.dirty_end = max(dirty_end, self.dirty_end)
+        self.valid_upto = min(self.valid_upto, start_line - 1)
+        self.schedule()
+
+    def on_scroll(self):
+        if self.visible_lines()[1] > self.valid_upto:
+            self.schedule()
+
+    def visible_lines(self):
+        first = int(self.widget.index("@0,0").split('.')[0])
+        last = int(self.widget.index(f"@0,{self.widget.winfo_height()}").split('.')[0])
+        return first, last
+
+    def start_state(self, line):
+        if line <= 1:
+            return self.lexer.initial_state
+        state = self.states[line - 2]
+        return self.lexer.initial_state if state is _UNKNOWN else state
+
+    def _run(self):
+        self.after_id = None
+        total = len(self.states)
+        deadline = time.perf_counter() + self.time_slice
+
+        if not self.viewport_done:
+            # Color what the user is looking at first, guessing the start state
+            # from possibly stale data; the linear pass below corrects it
+            first, last = self.visible_lines()
+            first = max(first, self.valid_upto + 1)
+            if first <= last:
+                self._lex_range(first, min(last, total), store=False)
+            self.viewport_done = True
+
+        while self.valid_upto < total and time.perf_counter() < deadline:
+            first = self.valid_upto + 1
+            last = min(total, first + 199)
+            converged = self._lex_range(first, last, store=True)
+            if converged:
+                self.valid_upto = max(converged, self.lexed_upto)
+                break
+
+        if self.valid_upto >= total:
+            self.dirty_end = 0
+        else:
+            self.after_id = self.widget.after(1, self._run)
+
+    def _lex_range(self, first, last, store):
+        """Lex and tag lines first..last; return the line where states converged, if any"""
+        text = self.widget.get(f"{first}.0", f"{last}.end")
+        state = self.start_state(first)
+        ranges = {}
+        converged = None
+        line_number = first - 1
+        for line_number, line in enumerate(text.split('\n'), first):
+            tokens, state = self.lexer.lex_line(line, state)
+            for tag, start, end in tokens:
+                if start < end:
+                    ranges.setdefault(tag, []).extend((f"{line_number}.{start}", f"{line_number}.{end}"))
+            if store:
+                previous = self.states[line_number - 1]
+                self.states[line_number - 1] = state
+                self.valid_upto = line_number
+                if (line_number >= self.dirty_end and line_number <= self.lexed_upto
+                        and previous is not _UNKNOWN and previous == state):
+                    converged = line_number
+                    break
+
+        end_line = line_number
+        for tag in TOKEN_TAGS:
+            self.widget.tag_remove(tag, f"{first}.0", f"{end_line}.end")
+        for tag, indices in ranges.items():
+            self.widget.tag_add(tag, *indices)
+        if store:
+            self.lexed_upto = max(self.lexed_upto, end_line)
+        return converged
@@ -0,0 +1,289 @@
+import time
+import pickle
+import tempfile
+
+# Rough per-operation bookkeeping cost, on top of the text it carries
+OP_OVERHEAD = 64
+
+
+class HistoryEntry:
+    """One undo step: a label and the edits that make it up.
+
+    ops is a list of (op, start, end, text) in the order they happened.
+    When the entry is spilled to disk, ops is None and location records where
+    its pickled ops live in the spill file.
+    """
+
+    __slots__ = ("label", "ops", "size", "location", "time", "coalescing")
+
+    def __init__(self, label, ops, coalescing=False):
+        self.label = label
+        self.ops = ops
+        self.size = sum(len(op[3]) + OP_OVERHEAD for op in ops)
+        self.location = None
+        self.time = time.monotonic()
+        self.coalescing = coalescing
+
+
+def describe(ops):
+    if len(ops) == 1:
+        op, _, _, text = ops[0]
+        preview = text if len(text) <= 20 else text[:17] + "..."
+        preview = preview.replace("\n", "\\n")
+        return f"Typing '{preview}'" if op == "insert" else f"Delete '{preview}'"
+    return f"{len(ops)} edits"
+
+
+class EditHistory:
+    """Bounded undo/redo history of buffer edits.
+
+    Consecutive typing (or backspacing) on one line within coalesce_delay
+    seconds is merged into one entry. Once the entries in memory exceed
+    max_memory bytes the oldest are pickled to a temporary spill file, and
+    beyond max_spill bytes on disk the oldest are dropped altogether. Edits
+    are applied back through apply(op, start, end, text), which must insert
+    text at start or delete start..end.
+    """
+
+    def __init__(self, max_memory=8 << 20, max_spill=256 << 20, coalesce_delay=1.0):
+        self.max_memory = max_memory
+        self.max_spill = max_spill
+        self.coalesce_delay = coalesce_delay
+        self.entries = []
+        self.position = 0
+        self.memory = 0
+        self.spill = None
+        # Bytes of entries still in the history, and the spill file's actual length
+        self.spill_size = 0
+        self.spill_end = 0
+        self.spilled_upto = 0
+        self.saved_position = 0
+        self.group = None
+        self.group_depth = 0
+        self.applying = False
+
+    def clear(self):
+        self.entries = []
+        self.position = 0
+        self.memory = 0
+        self.spilled_upto = 0
+        self.saved_position = 0
+        self.group = None
+        self.group_depth = 0
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+        self.spill_size = 0
+        self.spill_end = 0
+
+    def mark_saved(self):
+        self.saved_position = self.position
+
+    @property
+    def at_saved(self):
+        return self.position == self.saved_position
+
+    def size(self):
+        return len(self.entries)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.entries)
+
+    def begin_group(self, label):
+        """Collect every edit until the matching end_group() into one entry"""
+        if self.group_depth == 0:
+            self.group = HistoryEntry(label, [])
+        self.group_depth += 1
+
+    def end_group(self):
+        self.group_depth -= 1
+        if self.group_depth == 0:
+            group, self.group = self.group, None
+            if group.ops:
+                group.size = sum(len(op[3]) + OP_OVERHEAD for op in group.ops)
+                self._push(group)
+
+    def break_coalescing(self):
+        """Stop the next edit from merging into the previous entry (e.g. after a click)"""
+        if self.position and self.entries[self.position - 1].ops is not None:
+            self.entries[self.position - 1].coalescing = False
+
+    def record(self, op, start, end, text):
+        if self.applying:
+            return
+        if self.group is not None:
+            self.group.ops.append((op, start, end, text))
+            return
+        if self._coalesce(op, start, end, text):
+            return
+        typing = "\n" not in text and len(text) == 1
+        self._push(HistoryEntry(None, [(op, start, end, text)], coalescing=typing))
+
+    def _coalesce(self, op, start, end, text):
+        if not self.position or self.position != len(self.entries) or "\n" in text or len(text) != 1:
+            return False
+        last = self.entries[-1]
+        if not last.coalescing or len(last.ops) != 1 or time.monotonic() - last.time > self.coalesce_delay:
+            return False
+        last_op, last_start, last_end, last_text = last.ops[0]
+        if op != last_op:
+            return False
+        if op == "insert" and start == last_end:
+            last.ops[0] = (op, last_start, end, last_text + text)
+        elif op == "delete" and end == last_start:
+            last.ops[0] = (op, start, last_end, text + last_text)
+        elif op == "delete" and start == last_start:
+            # Forward delete keeps the position and eats the next character
+            last.ops[0] = (op, last_start, last_end, last_text + text)
+        else:
+            return False
+        last.size += len(text)
+        last.time = time.monotonic()
+        self.memory += len(text)
+        self._enforce_limits()
+        return True
+
+    def _drop_redo(self):
+        for dropped in self.entries[self.position:]:
+            if dropped.ops is not None:
+                self.memory -= dropped.size
+            else:
+                self.spill_size -= dropped.location[1]
+        del self.entries[self.position:]
+        self.spilled_upto = min(self.spilled_upto, self.position)
+        if self.saved_position > self.position:
+            self.saved_position = -1
+
+    def _push(self, entry):
+        # A new edit after undoing discards the redo tail
+        self._drop_redo()
+        self.entries.append(entry)
+        self.position = len(self.entries)
+        self.memory += entry.size
+        self._enforce_limits()
+
+    def spill_all(self):
+        """Move every entry to the spill file, e.g. while its document is in the background"""
+        while self.spilled_upto < len(self.entries):
+            entry = self.entries[self.spilled_upto]
+            # A spilled entry cannot be typed into
+            entry.coalescing = False
+            self._spill(entry)
+            self.spilled_upto += 1
+        self._enforce_limits()
+
+    def _enforce_limits(self):
+        # Spill the oldest in-memory entries, but never the one being typed into
+        while self.memory > self.max_memory and self.spilled_upto < len(self.entries) - 1:
+            self._spill(self.entries[self.spilled_upto])
+            self.spilled_upto += 1
+        while self.spill_size > self.max_spill and self.spilled_upto:
+            if not self.position:
+                # Only redo entries are left, and they can only be replayed
+                # in order from the oldest, so none can be dropped alone
+                self._drop_redo()
+                break
+            self._drop_oldest()
+        self._compact_spill()
+
+    def _spill(self, entry):
+        if entry.ops is None:
+            return
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile(prefix="text_editor_undo_")
+        data = pickle.dumps(entry.ops, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spill.seek(self.spill_end)
+        entry.location = (self.spill_end, len(data))
+        self.spill.write(data)
+        self.spill_end += len(data)
+        self.spill_size += len(data)
+        self.memory -= entry.size
+        # Keep the description so the history list never has to read it back
+        entry.label = entry.label or describe(entry.ops)
+        entry.ops = None
+
+    def _drop_oldest(self):
+        entry = self.entries.pop(0)
+        if entry.location:
+            self.spill_size -= entry.location[1]
+        self.spilled_upto -= 1
+        self.position -= 1
+        self.saved_position -= 1
+
+    def _compact_spill(self):
+        """Rewrite the spill file once most of it belongs to dropped entries"""
+        if self.spill is None or self.spill_end <= 2 * self.spill_size:
+            return
+        old = self.spill
+        self.spill = None
+        self.spill_end = 0
+        if self.spill_size:
+            self.spill = tempfile.TemporaryFile(prefix="text_editor_undo_")
+            for entry in self.entries:
+                if entry.location is None:
+                    continue
+                offset, length = entry.location
+                old.seek(offset)
+                self.spill.write(old.read(length))
+                entry.location = (self.spill_end, length)
+                self.spill_end += length
+        old.close()
+
+    def _load(self, entry):
+        if entry.ops is not None:
+            return entry.ops
+        offset, length = entry.location
+        self.spill.seek(offset)
+        return pickle.loads(self.spill.read(length))
+
+    def labels(self):
+        """Describe every entry, oldest first, without reading spilled ones back"""
+        return [entry.label or describe(entry.ops) for entry in self.entries]
+
+    def undo(self, apply):
+        """Revert the newest applied entry; return the index to place the cursor at"""
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        ops = self._load(self.entries[self.position])
+        self.entries[self.position].coalescing = False
+        cursor = None
+        self.applying = True
+        try:
+            for op, start, end, text in reversed(ops):
+                if op == "insert":
+                    apply("delete", start, end, text)
+                else:
+                    apply("insert", start, end, text)
+                cursor = start
+        finally:
+            self.applying = False
+        return cursor
+
+    def redo(self, apply):
+        if not self.can_redo():
+            return None
+        ops = self._load(self.entries[self.position])
+        self.position += 1
+        cursor = None
+        self.applying = True
+        try:
+            for op, start, end, text in ops:
+                apply(op, start, end, text)
+                cursor = end if op == "insert" else start
+        finally:
+            self.applying = False
+        return cursor
+
+    def goto(self, position, apply):
+        """Undo or redo until `position` entries are applied"""
+        position = max(0, min(position, len(self.entries)))
+        cursor = None
+        while self.position > position:
+            cursor = self.undo(apply)
+        while self.position < position:
+            cursor = self.redo(apply)
+        return cursor
@@ -0,0 +1,355 @@
+import os
+import io
+import json
+import time
+import uuid
+import queue
+import struct
+import threading
+
+from file_io import atomic_write
+from rich_format import read_text
+
+INSERT = 1
+DELETE = 2
+# op, start line, start col, end line, end col, length of the UTF-8 payload
+RECORD = struct.Struct('<BIIIII')
+
+
+def recovery_dir():
+    """Directory holding the edit journals of running and crashed sessions"""
+    return os.path.join(os.path.expanduser("~"), ".text_editor", "recovery")
+
+
+def parse_index(index):
+    line, col = index.split('.')
+    return int(line), int(col)
+
+
+def _windows_pid_alive(pid):
+    import ctypes
+    from ctypes import wintypes
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    ERROR_ACCESS_DENIED = 5
+    STILL_ACTIVE = 259
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists but is not ours to inspect
+        return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    if os.name == 'nt':
+        return _windows_pid_alive(pid)
+    if os.name != 'posix':
+        # No way to tell; never hand out a journal that may still be in use
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JournalWriter(threading.Thread):
+    """Run journal disk work (writes, fsyncs, snapshots) off the UI thread.
+
+    Tasks run one at a time in the order they were submitted, so a journal's
+    reset, appends and close reach the disk in sequence. Errors are kept for
+    the UI thread to collect with take_error().
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self._tasks = queue.Queue()
+        self._errors = queue.Queue()
+        self._lock = threading.Lock()
+        self._unfinished = 0
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def submit(self, func, *args):
+        with self._lock:
+            self._unfinished += 1
+            self._idle.clear()
+        self._tasks.put((func, args))
+
+    def flush(self, timeout=None):
+        """Block until every submitted task has run"""
+        return self._idle.wait(timeout)
+
+    def take_error(self):
+        try:
+            return self._errors.get_nowait()
+        except queue.Empty:
+            return None
+
+    def run(self):
+        while True:
+            func, args = self._tasks.get()
+            try:
+                func(*args)
+            except Exception as e:
+                # Keep running: a failed task must not take later ones with it
+                self._errors.put(e)
+            finally:
+                with self._lock:
+                    self._unfinished -= 1
+                    if not self._unfinished:
+                        self._idle.set()
+
+
+class EditJournal:
+    """Append-only log of the edits made to one buffer.
+
+    A session is three files in the recovery directory: <id>.json with
+    metadata, <id>.snapshot with the text the journal starts from (absent when
+    it starts from the file on disk or an empty buffer) and <id>.journal with
+    binary insert/delete records. compact() folds the journal into a new
+    snapshot; discard() removes the session once the work is safely saved.
+
+    Edits are encoded into a memory buffer; everything that touches the disk
+    runs on writer (a JournalWriter) when one is given, so the caller only
+    hands over bytes or a text snapshot. Without a writer the work is done inline.
+    """
+
+    def __init__(self, directory=None, session_id=None, writer=None):
+        self.directory = directory or recovery_dir()
+        self.session_id = session_id or uuid.uuid4().hex
+        self.writer = writer
+        self.buffer = io.BytesIO()
+        self.active = False
+        self.file_path = None
+        self.size = 0
+        # Only touched by the tasks below, on the writer thread
+        self.journal = None
+        self.meta = {}
+
+    def _path(self, suffix):
+        return os.path.join(self.directory, f"{self.session_id}.{suffix}")
+
+    def _submit(self, func, *args):
+        if self.writer is None:
+            func(*args)
+        else:
+            self.writer.submit(func, *args)
+
+    def reset(self, file_path=None, base="empty", text=None):
+        """Start a fresh journal on top of a known base text.
+
+        base is "empty" for a new buffer, "file" when the buffer matches
+        file_path on disk, or "snapshot" to store text as the starting point.
+        """
+        self.buffer = io.BytesIO()
+        self.active = True
+        self.file_path = file_path
+        self.size = 0
+        self._submit(self._reset, file_path, base, text)
+
+    def set_file(self, file_path):
+        """Record a new file name for the buffer (after Save As)"""
+        if not self.active:
+            return
+        self.file_path = file_path
+        self._submit(self._set_file, file_path)
+
+    def record(self, op, start, end, text):
+        """Append one edit; it reaches the disk on the next flush()"""
+        if not self.active:
+            return
+        start_line, start_col = parse_index(start)
+        end_line, end_col = parse_index(end)
+        if op == "insert":
+            payload = text.encode('utf-8')
+            self.buffer.write(RECORD.pack(INSERT, start_line, start_col, end_line, end_col, len(payload)))
+            self.buffer.write(payload)
+        else:
+            self.buffer.write(RECORD.pack(DELETE, start_line, start_col, end_line, end_col, 0))
+
+    def flush(self):
+        if not self.active or not self.buffer.tell():
+            return
+        data = self.buffer.getvalue()
+        self.buffer = io.BytesIO()
+        self.size += len(data)
+        self._submit(self._append, data)
+
+    @property
+    def dirty(self):
+        return self.size > 0 or self.buffer.tell() > 0
+
+    def compact(self, text):
+        """Replace the journal with a snapshot of the current text"""
+        if not self.active:
+            return
+        self.reset(self.file_path, base="snapshot", text=text)
+
+    def close(self):
+        if self.active:
+            self.flush()
+            self.active = False
+            self._submit(self._close)
+
+    def discard(self):
+        self.close()
+        self._submit(self._remove)
+
+    # Disk work, run on the writer
+
+    def _write_meta(self):
+        atomic_write(self._path("json"), json.dumps(self.meta))
+
+    def _reset(self, file_path, base, text):
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.meta = {
+            "pid": os.getpid(),
+            "file": file_path,
+            "base": base,
+            "updated": time.time(),
+        }
+        if base == "file" and file_path:
+            stat = os.stat(file_path)
+            self.meta["base_size"] = stat.st_size
+            self.meta["base_mtime"] = stat.st_mtime
+        if base == "snapshot":
+            atomic_write(self._path("snapshot"), (text or "").encode('utf-8'))
+        elif os.path.exists(self._path("snapshot")):
+            os.remove(self._path("snapshot"))
+        self.journal = open(self._path("journal"), 'wb')
+        self._write_meta()
+
+    def _set_file(self, file_path):
+        if self.journal is None:
+            return
+        self.meta["file"] = file_path
+        self._write_meta()
+
+    def _append(self, data):
+        if self.journal is None:
+            return
+        self.journal.write(data)
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    def _close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def _remove(self):
+        for suffix in ("journal", "snapshot", "json"):
+            try:
+                os.remove(self._path(suffix))
+            except FileNotFoundError:
+                pass
+
+
+def read_records(path):
+    """Yield (op, start, end, text) from a journal file, stopping at a torn record"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos + RECORD.size <= len(data):
+        op, start_line, start_col, end_line, end_col, length = RECORD.unpack_from(data, pos)
+        pos += RECORD.size
+        if pos + length > len(data):
+            break
+        text = data[pos:pos + length].decode('utf-8')
+        pos += length
+        yield ("insert" if op == INSERT else "delete"), f"{start_line}.{start_col}", f"{end_line}.{end_col}", text
+
+
+class RecoverableSession:
+    """A journal left behind by an editor that did not exit cleanly"""
+
+    def __init__(self, directory, session_id, meta):
+        self.directory = directory
+        self.session_id = session_id
+        self.meta = meta
+
+    @property
+    def file_path(self):
+        return self.meta.get("file")
+
+    @property
+    def updated(self):
+        return self.meta.get("updated", 0)
+
+    def _path(self, suffix):
+        return os.path.join(self.directory, f"{self.session_id}.{suffix}")
+
+    def has_changes(self):
+        journal = self._path("journal")
+        if os.path.exists(journal) and os.path.getsize(journal) > 0:
+            return True
+        return self.meta.get("base") == "snapshot"
+
+    def base_changed(self):
+        """True when the file the journal was recorded against changed on disk"""
+        if self.meta.get("base") != "file":
+            return False
+        try:
+            stat = os.stat(self.file_path)
+        except (OSError, TypeError):
+            return True
+        return stat.st_size != self.meta.get("base_size") or stat.st_mtime != self.meta.get("base_mtime")
+
+    def base_text(self):
+        base = self.meta.get("base")
+        if base == "snapshot":
+            with open(self._path("snapshot"), 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        if base == "file" and self.file_path and os.path.exists(self.file_path):
+            return read_text(self.file_path)
+        return ""
+
+    def records(self):
+        journal = self._path("journal")
+        if not os.path.exists(journal):
+            return iter(())
+        return read_records(journal)
+
+    def discard(self):
+        EditJournal(self.directory, self.session_id).discard()
+
+
+def find_sessions(directory=None):
+    """Return abandoned sessions with unsaved work, newest first"""
+    directory = directory or recovery_dir()
+    if not os.path.isdir(directory):
+        return []
+    sessions = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        session_id = name[:-len(".json")]
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if pid_alive(meta.get("pid", -1)):
+            continue
+        session = RecoverableSession(directory, session_id, meta)
+        if session.has_changes():
+            sessions.append(session)
+        else:
+            session.discard()
+    sessions.sort(key=lambda s: s.updated, reverse=True)
+    return sessions
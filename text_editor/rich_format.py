@@ -0,0 +1,142 @@
+import sys
+import json
+import zlib
+import struct
+from array import array
+from operator import add, sub
+from itertools import accumulate, repeat
+
+MAGIC = b'TEDOC\x01'
+EXTENSION = '.tdoc'
+HEADER = struct.Struct('<IQ')  # metadata length, text length
+RUNS = struct.Struct('<II')    # run count, compressed size
+
+
+def is_rich_path(path):
+    return bool(path) and path.lower().endswith(EXTENSION)
+
+
+def is_rich_file(path):
+    """Sniff the magic bytes so plain files never pay for a full decode"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def line_offsets(text):
+    """Offset of the first character of every line, for Tk index conversion"""
+    return [0] + list(accumulate(len(line) + 1 for line in text.split('\n')))[:-1]
+
+
+def _to_array(values):
+    runs = array('I', values)
+    if sys.byteorder == 'big':
+        runs.byteswap()
+    return runs
+
+
+def _from_bytes(data):
+    runs = array('I')
+    runs.frombytes(data)
+    if sys.byteorder == 'big':
+        runs.byteswap()
+    return runs
+
+
+def ranges_to_runs(offsets, ranges, length):
+    """Turn a flat Tk tag_ranges tuple into delta-encoded (gap, length) pairs.
+
+    length is the length of the text; a range ending at Tk's "end" index,
+    the line after the last, is clamped to it.
+    """
+    if not ranges:
+        return []
+    # Read as JSON, "line.col, line.col, ..." becomes a list of ints in one C
+    # pass instead of a split and an int() call per part
+    numbers = json.loads('[' + ','.join(map(str, ranges)).replace('.', ',') + ']')
+    starts = [0, *offsets, length]
+    bounds = list(map(min, map(add, map(starts.__getitem__, numbers[0::2]), numbers[1::2]), repeat(length)))
+    return list(map(sub, bounds, [0, *bounds[:-1]]))
+
+
+def runs_to_indices(offsets, runs):
+    """Expand (gap, length) pairs back into a flat list of Tk indices"""
+    # The running sum of gaps and lengths is start, end, start, end, ... and
+    # never decreases, so walk forward through the lines rather than search
+    ends = offsets[1:]
+    ends.append(float('inf'))
+    indices = []
+    append = indices.append
+    line = 0
+    start = 0
+    end = ends[0]
+    prefix = "1."
+    for bound in accumulate(runs):
+        if bound >= end:
+            while bound >= ends[line]:
+                line += 1
+            start = offsets[line]
+            end = ends[line]
+            prefix = f"{line + 1}."
+        append(prefix + str(bound - start))
+    return indices
+
+
+def encode_document(text, tag_ranges, tag_config=None):
+    """Serialize text plus its tags.
+
+    tag_ranges maps a tag name to the flat tuple returned by Text.tag_ranges;
+    tag_config maps a tag name to the options needed to recreate it.
+    """
+    offsets = line_offsets(text)
+    names = [name for name, ranges in tag_ranges.items() if ranges]
+    meta = json.dumps({"tags": names, "config": tag_config or {}}).encode('utf-8')
+    payload = text.encode('utf-8')
+
+    parts = [MAGIC, HEADER.pack(len(meta), len(payload)), meta, payload]
+    for name in names:
+        runs = _to_array(ranges_to_runs(offsets, tag_ranges[name], len(text)))
+        block = zlib.compress(runs.tobytes(), 1)
+        parts.append(RUNS.pack(len(runs) // 2, len(block)))
+        parts.append(block)
+    return b''.join(parts)
+
+
+def decode_document(data):
+    """Return (text, {tag: [index, index, ...]}, tag_config) from encoded bytes"""
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a formatted document")
+    pos = len(MAGIC)
+    meta_length, text_length = HEADER.unpack_from(data, pos)
+    pos += HEADER.size
+    meta = json.loads(data[pos:pos + meta_length].decode('utf-8'))
+    pos += meta_length
+    text = data[pos:pos + text_length].decode('utf-8')
+    pos += text_length
+
+    offsets = line_offsets(text)
+    tags = {}
+    for name in meta["tags"]:
+        count, size = RUNS.unpack_from(data, pos)
+        pos += RUNS.size
+        runs = _from_bytes(zlib.decompress(data[pos:pos + size]))
+        pos += size
+        if len(runs) != count * 2:
+            raise ValueError(f"Corrupt runs for tag {name}")
+        tags[name] = runs_to_indices(offsets, runs)
+    return text, tags, meta.get("config", {})
+
+
+def read_document(path):
+    with open(path, 'rb') as f:
+        return decode_document(f.read())
+
+
+def read_text(path):
+    """Return just the text of a file, formatted or plain"""
+    if is_rich_file(path):
+        return read_document(path)[0]
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
@@ -0,0 +1,197 @@
+import re
+import threading
+import queue
+import time
+
+
+class SearchQuery:
+    """What to look for and how to match it"""
+
+    def __init__(self, pattern, regex=False, case_sensitive=False, whole_word=False):
+        self.pattern = pattern
+        self.regex = regex
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+
+    def compile(self):
+        """Compile the query, raising re.error for an invalid regex"""
+        source = self.pattern if self.regex else re.escape(self.pattern)
+        if self.whole_word:
+            source = r'\b(?:' + source + r')\b'
+        flags = re.MULTILINE
+        if not self.case_sensitive:
+            flags |= re.IGNORECASE
+        return re.compile(source, flags)
+
+    def compile_bytes(self):
+        """Compile the query for scanning raw UTF-8 bytes (case folding is ASCII only)"""
+        pattern = self.pattern.encode('utf-8')
+        source = pattern if self.regex else re.escape(pattern)
+        if self.whole_word:
+            source = rb'\b(?:' + source + rb')\b'
+        flags = re.MULTILINE
+        if not self.case_sensitive:
+            flags |= re.IGNORECASE
+        return re.compile(source, flags)
+
+    def key(self):
+        return (self.pattern, self.regex, self.case_sensitive, self.whole_word)
+
+    def __eq__(self, other):
+        return isinstance(other, SearchQuery) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+
+class OffsetMapper:
+    """Convert increasing character offsets into Tk style (line, column) pairs.
+
+    Newlines are counted incrementally between consecutive offsets, so mapping
+    a sorted run of matches costs one pass over the text done in C.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.line = 1
+        self.line_start = 0
+
+    def position(self, offset):
+        if offset < self.pos:
+            self.pos = 0
+            self.line = 1
+            self.line_start = 0
+        newlines = self.text.count('\n', self.pos, offset)
+        if newlines:
+            self.line += newlines
+            self.line_start = self.text.rfind('\n', self.pos, offset) + 1
+        self.pos = offset
+        return self.line, offset - self.line_start
+
+
+def iter_chunks(text, chunk_size):
+    """Yield (start, end) windows of text, each ending on a line boundary"""
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            newline = text.find('\n', end)
+            end = length if newline == -1 else newline + 1
+        yield start, end
+        start = end
+
+
+def make_replacer(replacement, regex=False):
+    """Return a function producing the replacement text for a match.
+
+    In regex mode the replacement may refer to groups (\\1, \\g<name>),
+    otherwise it is inserted literally.
+    """
+    if regex:
+        return lambda match: match.expand(replacement)
+    return lambda match: replacement
+
+
+class SearchJob(threading.Thread):
+    """Scan a snapshot of the buffer and push batches of matches onto a queue.
+
+    Each item on `results` is a list of (start_line, start_col, end_line, end_col)
+    tuples, extended with the replacement text when a replacer is given; None
+    marks the end of the search. A search scans the text in line-aligned
+    chunks so the GIL is released regularly and a cancelled job stops quickly;
+    a match spanning two chunks is not reported, nor is an empty match. A
+    replace scans the text in one pass and reports exactly the matches
+    re.sub would replace, empty ones included.
+    """
+
+    def __init__(self, text, regex, batch_size=500, chunk_size=1 << 20, replacer=None):
+        super().__init__(daemon=True)
+        self.text = text
+        self.regex = regex
+        self.replacer = replacer
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.results = queue.Queue()
+        self.match_count = 0
+        self.finished = False
+        self.error = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _matches(self):
+        if self.replacer is not None:
+            yield from self.regex.finditer(self.text)
+            return
+        resume = 0
+        for start, end in iter_chunks(self.text, self.chunk_size):
+            if self.cancelled:
+                return
+            for match in self.regex.finditer(self.text, max(start, resume), end):
+                if match.start() == match.end():
+                    continue
+                resume = match.end()
+                yield match
+            # Give the UI thread a chance to run between chunks
+            time.sleep(0)
+
+    def run(self):
+        try:
+            mapper = OffsetMapper(self.text)
+            batch = []
+            for match in self._matches():
+                span = mapper.position(match.start()) + mapper.position(match.end())
+                if self.replacer is not None:
+                    span += (self.replacer(match),)
+                batch.append(span)
+                if len(batch) >= self.batch_size:
+                    self.match_count += len(batch)
+                    self.results.put(batch)
+                    batch = []
+                    if self.cancelled:
+                        return
+                    time.sleep(0)
+            if batch:
+                self.match_count += len(batch)
+                self.results.put(batch)
+        except (re.error, IndexError) as e:
+            # Raised by a replacement template referring to a missing group
+            self.error = e
+        finally:
+            self.text = None
+            self.finished = True
+            self.results.put(None)
+
+
+class SearchEngine:
+    """Runs one search at a time, cancelling the previous one when a new query starts"""
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.job = None
+
+    def start(self, text, query, replacement=None):
+        """Start searching text for query and return the running SearchJob.
+
+        When replacement is given every match also carries its replacement text.
+        """
+        regex = query.compile()
+        replacer = None
+        if replacement is not None:
+            replacer = make_replacer(replacement, query.regex)
+        self.cancel()
+        self.job = SearchJob(text, regex, self.batch_size, replacer=replacer)
+        self.job.start()
+        return self.job
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recent_files (
+    path TEXT PRIMARY KEY,
+    opened REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_state (
+    path TEXT PRIMARY KEY,
+    cursor TEXT NOT NULL,
+    yview REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS open_tabs (
+    position INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def config_dir():
+    """Per-user configuration directory for the editor, following platform conventions"""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "TextEditor")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Application Support", "TextEditor")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "text_editor")
+
+
+class SessionStore:
+    """Recent files, per-file cursor and scroll positions and the open tabs.
+
+    Kept in an SQLite database in WAL mode, so every update is a small
+    transaction that appends to the write-ahead log instead of rewriting a
+    whole file, and a crash mid-write never loses what was there before.
+    """
+
+    def __init__(self, path=None, state_limit=1000):
+        path = path or os.path.join(config_dir(), "session.db")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.state_limit = state_limit
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the database consistent without an fsync on every commit
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def recent_files(self, limit):
+        rows = self.connection.execute(
+            "SELECT path FROM recent_files ORDER BY opened DESC LIMIT ?", (limit,))
+        return [path for (path,) in rows]
+
+    def add_recent_file(self, path, limit):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO recent_files (path, opened) VALUES (?, ?)", (path, time.time()))
+            self.connection.execute(
+                "DELETE FROM recent_files WHERE path NOT IN "
+                "(SELECT path FROM recent_files ORDER BY opened DESC LIMIT ?)", (limit,))
+
+    def remove_recent_file(self, path):
+        with self.connection:
+            self.connection.execute("DELETE FROM recent_files WHERE path = ?", (path,))
+
+    def file_state(self, path):
+        """Return (cursor index, yview fraction) last saved for path, or None"""
+        return self.connection.execute(
+            "SELECT cursor, yview FROM file_state WHERE path = ?", (os.path.abspath(path),)).fetchone()
+
+    def save_file_states(self, states):
+        """Store (path, cursor, yview) for each file, keeping the newest state_limit entries"""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO file_state (path, cursor, yview, updated) VALUES (?, ?, ?, ?)",
+                [(os.path.abspath(path), cursor, yview, now) for path, cursor, yview in states])
+            self.connection.execute(
+                "DELETE FROM file_state WHERE path NOT IN "
+                "(SELECT path FROM file_state ORDER BY updated DESC LIMIT ?)", (self.state_limit,))
+
+    def open_tabs(self):
+        """Return ([path, ...], index of the active tab) from the last session"""
+        rows = self.connection.execute("SELECT path, active FROM open_tabs ORDER BY position").fetchall()
+        active = next((i for i, (_, is_active) in enumerate(rows) if is_active), 0)
+        return [path for path, _ in rows], active
+
+    def save_open_tabs(self, paths, active):
+        with self.connection:
+            self.connection.execute("DELETE FROM open_tabs")
+            self.connection.executemany(
+                "INSERT INTO open_tabs (position, path, active) VALUES (?, ?, ?)",
+                [(i, path, int(i == active)) for i, path in enumerate(paths)])
+
+    def migrate_recent_files(self, legacy_path):
+        """Import a recent_files.json from older versions, then set it aside"""
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                paths = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(paths, list):
+            return
+        now = time.time()
+        with self.connection:
+            # The list is newest first; keep that order in the timestamps
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO recent_files (path, opened) VALUES (?, ?)",
+                [(path, now - i) for i, path in enumerate(paths) if isinstance(path, str)])
+        os.replace(legacy_path, legacy_path + ".migrated")
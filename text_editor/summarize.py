@@ -0,0 +1,168 @@
+import os
+import sys
+import queue
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+
+# The summarizer project sits next to this one in the repository
+SUMMARIZER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "text_summarizer")
+
+# (method, label, TextSummarizer method), in the order the panel shows them
+METHODS = [
+    ("title", "Title-based", "get_title_based_summary"),
+    ("keyword", "Keyword-based", "get_keyword_based_summary"),
+    ("cueword", "Cueword-based", "get_cueword_based_summary"),
+    ("tfidf", "TF-IDF-based", "get_tfidf_based_summary"),
+]
+
+
+def _latest(requests, job):
+    """Skip ahead to the newest request waiting in the queue (None means stop)"""
+    while True:
+        try:
+            newer = requests.get_nowait()
+        except queue.Empty:
+            return job
+        if newer is None:
+            return None
+        job = newer
+
+
+def serve(requests, responses, sentence_splitter, num_sentences):
+    """Worker process: summarize each (generation, text, methods) request.
+
+    Results go back one method at a time as (generation, method, summary,
+    error). Before each method the worker looks for a newer request and,
+    if there is one, abandons the rest of the stale job.
+    """
+    try:
+        if SUMMARIZER_DIR not in sys.path:
+            sys.path.insert(0, SUMMARIZER_DIR)
+        from text_summarizer import TextSummarizer
+        summarizer = TextSummarizer(sentence_splitter)
+    except Exception as e:
+        responses.put((None, None, None, f"Summarizer unavailable: {e}"))
+        return
+    functions = {method: function for method, _, function in METHODS}
+    job = requests.get()
+    while job is not None:
+        generation, text, methods = job
+        for method in methods:
+            newer = _latest(requests, job)
+            if newer is not job:
+                job = newer
+                break
+            try:
+                summary = getattr(summarizer, functions[method])(text, num_sentences)
+                responses.put((generation, method, summarizer.format_summary(summary), None))
+            except Exception as e:
+                responses.put((generation, method, None, str(e)))
+        else:
+            job = requests.get()
+
+
+class SummaryClient:
+    """Summarize text with TextSummarizer in a separate process.
+
+    NLTK and scikit-learn are loaded and run only in the worker, so the UI
+    thread never waits on them. Every request gets a new generation number;
+    results from older generations are dropped, and the worker abandons a
+    job as soon as a newer one arrives. Finished summaries are cached by a
+    hash of the text, so unchanged text is answered without the worker.
+    """
+
+    labels = [(method, label) for method, label, _ in METHODS]
+
+    def __init__(self, num_sentences=5, sentence_splitter="regex", cache_size=32):
+        self.num_sentences = num_sentences
+        # The regex splitter needs no Punkt download and is faster on long documents
+        self.sentence_splitter = sentence_splitter
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.generation = 0
+        self.key = None
+        self.pending = set()
+        self.error = None
+        self.process = None
+        self.requests = None
+        self.responses = None
+
+    def _start(self):
+        # spawn, not fork: a forked copy of a process running Tk is not safe to use
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.responses = context.Queue()
+        self.process = context.Process(
+            target=serve,
+            args=(self.requests, self.responses, self.sentence_splitter, self.num_sentences),
+            daemon=True
+        )
+        self.process.start()
+
+    def request(self, text):
+        """Start summarizing text; returns the results already cached for it.
+
+        The returned dict maps method to (summary, error). Any methods not
+        in it are in pending until poll() delivers them.
+        """
+        self.cancel()
+        digest = hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+        self.key = (digest, self.num_sentences)
+        cached = self.cache.get(self.key, {})
+        if self.key in self.cache:
+            self.cache.move_to_end(self.key)
+        self.pending = {method for method, _ in self.labels if method not in cached}
+        if self.pending:
+            if self.process is None or not self.process.is_alive():
+                self._start()
+            methods = [method for method, _ in self.labels if method in self.pending]
+            self.requests.put((self.generation, text, methods))
+        return dict(cached)
+
+    def cancel(self):
+        """Forget the current request and tell the worker to drop it"""
+        self.generation += 1
+        self.error = None
+        if self.pending and self.process is not None:
+            self.requests.put((self.generation, None, []))
+        self.pending = set()
+
+    def poll(self):
+        """Return {method: (summary, error)} for results of the current request that have arrived"""
+        arrived = {}
+        while self.responses is not None:
+            try:
+                generation, method, summary, error = self.responses.get_nowait()
+            except queue.Empty:
+                break
+            if generation is None:
+                # The worker could not start; it has exited
+                self.error = error
+                self.pending = set()
+                break
+            if generation != self.generation or method not in self.pending:
+                continue
+            self.pending.discard(method)
+            arrived[method] = (summary, error)
+            if error is None:
+                self._remember(method, summary)
+        if self.pending and not self.process.is_alive():
+            self.error = "Summarizer process exited"
+            self.pending = set()
+        return arrived
+
+    def _remember(self, method, summary):
+        self.cache.setdefault(self.key, {})[method] = (summary, None)
+        self.cache.move_to_end(self.key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def close(self):
+        self.cancel()
+        if self.process is not None and self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout=1)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.process = None
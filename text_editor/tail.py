@@ -0,0 +1,162 @@
+import os
+import queue
+import select
+import codecs
+import ctypes
+import ctypes.util
+import threading
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+def read_tail(path, max_lines, block_size=1 << 16, encoding='utf-8'):
+    """Return (text, size): the last max_lines lines of path and the size read up to.
+
+    Reads backwards from the end in blocks, so the cost depends on the lines
+    kept rather than on the size of the file.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        position = size
+        blocks = []
+        newlines = 0
+        while position > 0 and newlines <= max_lines:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            newlines += block.count(b'\n')
+            blocks.append(block)
+    data = b''.join(reversed(blocks))
+    if position > 0:
+        # Drop the partial first line (and everything before the kept lines)
+        cut = len(data)
+        for _ in range(max_lines):
+            cut = data.rfind(b'\n', 0, cut - 1) if cut > 0 else -1
+            if cut < 0:
+                break
+        data = data[cut + 1:] if cut >= 0 else data
+    text = data.decode(encoding, errors='replace').replace('\r\n', '\n')
+    return text, size
+
+
+class Inotify:
+    """Minimal inotify watch on one file, through libc.
+
+    Raises OSError where inotify is not available (anything but Linux), in
+    which case callers fall back to polling.
+    """
+
+    def __init__(self, path):
+        if not os.path.exists("/proc/sys/fs/inotify"):
+            raise OSError("inotify is not available")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_ATTRIB | IN_DELETE_SELF | IN_MOVE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        """Block until the file changes or timeout seconds pass"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        return bool(ready)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileFollower(threading.Thread):
+    """Read what gets appended to a file, like tail -F.
+
+    Starting at byte offset, every new chunk of the file is decoded and put
+    on the results queue as a string. A file that shrinks (truncated) or is
+    replaced (rotated) is read again from the start. Changes are picked up
+    through inotify where available, otherwise by checking the file's size
+    every poll_interval seconds.
+    """
+
+    def __init__(self, path, offset=0, poll_interval=0.5, chunk_size=1 << 20, encoding='utf-8'):
+        super().__init__(daemon=True)
+        self.path = path
+        self.offset = offset
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.results = queue.Queue()
+        self.error = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _watch(self):
+        try:
+            return Inotify(self.path)
+        except (OSError, AttributeError):
+            return None
+
+    def run(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        watch = self._watch()
+        file = None
+        try:
+            while not self._cancel.is_set():
+                try:
+                    stat = os.stat(self.path)
+                except FileNotFoundError:
+                    # Mid-rotation; wait for the new file to appear
+                    stat = None
+                if stat is not None:
+                    if file is None or os.fstat(file.fileno()).st_ino != stat.st_ino:
+                        # First open or the file was rotated: follow the new one
+                        if file is not None:
+                            file.close()
+                            self.offset = 0
+                            if watch is not None:
+                                watch.close()
+                            watch = self._watch()
+                        file = open(self.path, 'rb')
+                    if stat.st_size < self.offset:
+                        self.offset = 0
+                        decoder.reset()
+                    if stat.st_size > self.offset:
+                        self._read_appended(file, decoder)
+                        continue
+                if watch is not None:
+                    watch.wait(self.poll_interval * 4)
+                else:
+                    self._cancel.wait(self.poll_interval)
+        except OSError as e:
+            self.error = e
+        finally:
+            if file is not None:
+                file.close()
+            if watch is not None:
+                watch.close()
+            self.results.put(None)
+
+    def _read_appended(self, file, decoder):
+        file.seek(self.offset)
+        while not self._cancel.is_set():
+            data = file.read(self.chunk_size)
+            if not data:
+                break
+            self.offset += len(data)
+            text = decoder.decode(data)
+            if text:
+                self.results.put(text.replace('\r\n', '\n'))
@@ -0,0 +1,35 @@
+import time
+
+from core import TextBuffer, BufferView
+from highlighter import Highlighter, PythonLexer
+
+
+def highlight(text):
+    buffer = TextBuffer(text)
+    view = BufferView(buffer)
+    highlighter = Highlighter(view, PythonLexer())
+    buffer.add_listener(highlighter.on_edit)
+    settle(view, highlighter)
+    return buffer, view, highlighter
+
+
+def settle(view, highlighter):
+    while True:
+        view.update()
+        if highlighter.after_id is None:
+            return
+        time.sleep(0.002)
+
+
+def test_multi_line_delete_keeps_the_end_line_state():
+    buffer, view, highlighter = highlight('a = 1\nb = """\nc\n"""\nd = 2')
+    buffer.delete("1.5", "3.0")
+    settle(view, highlighter)
+    assert highlighter.states == highlight(buffer.get())[2].states
+
+
+def test_multi_line_delete_closing_a_string():
+    buffer, view, highlighter = highlight('a = """\nb\n"""\nc = 1\nd = 2')
+    buffer.delete("1.4", "3.3")
+    settle(view, highlighter)
+    assert highlighter.states == highlight(buffer.get())[2].states
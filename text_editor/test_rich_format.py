@@ -0,0 +1,14 @@
+from rich_format import encode_document, decode_document
+
+
+def test_round_trip_keeps_tag_indices():
+    text = "ab\n\ncd"
+    tags = {"bold": ("1.1", "3.1", "3.1", "3.2")}
+    assert decode_document(encode_document(text, tags)) == (text, {"bold": ["1.1", "3.1", "3.1", "3.2"]}, {})
+
+
+def test_range_ending_at_end_is_clamped_to_the_text():
+    # Tk's "end" is the line after the last, e.g. after Select All and Bold
+    text = "ab\ncd"
+    decoded = decode_document(encode_document(text, {"red": ("1.0", "3.0")}, {"red": {"foreground": "red"}}))
+    assert decoded == (text, {"red": ["1.0", "2.2"]}, {"red": {"foreground": "red"}})
@@ -1,39 +1,146 @@
+import time
+# Taken before anything else is imported so the startup time covers module loading
+STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, font
 from tkinter import scrolledtext
 import os
-import json
 import re
+import sqlite3
 import platform
+from datetime import datetime
+import queue
+from bisect import bisect_left
+
+from search_engine import SearchEngine, SearchQuery, make_replacer
+from file_io import SaveWorker
+from edit_events import EditObserver
+from recovery import JournalWriter, find_sessions
+from format_runs import FormatRuns
+from highlighter import Highlighter, LEXERS, TOKEN_TAGS, lexer_for_filename
+from rich_format import is_rich_path, encode_document
+from documents import Document, load_file
+from session_store import SessionStore
+from core import text_stats
+from diagnostics import Diagnostics
 
 class TextEditor:
     def __init__(self, root):
         self.root = root
         self.root.title("Advanced Text Editor")
         self.root.geometry("1000x700")
+        # Hooks Tk's callback dispatch, so it has to exist before any binding
+        self.diagnostics = Diagnostics(root)
         
         # Initialize variables
-        self.current_file = None
         self.current_font = font.Font(family="Arial", size=10)
         self.current_font_size = 10
         self.current_font_family = "Arial"
         self.recent_files = []
+        self.recent_files_loaded = False
+        self.session = None
+        self.font_family_list = None
+        self.font_dialog = None
+        self.color_dialog = None
         self.max_recent_files = 5
         self.auto_save = True
         self.auto_save_interval = 300000  # 5 minutes
+        self.journal_flush_interval = 1000
+        self.journal_compact_size = 1 << 20
         self.format_start_mark = None
         self.current_format_tags = set()
+        self.format_runs = FormatRuns()
         self.line_number_update_id = None
         self.status_update_id = None
+        self.search_engine = SearchEngine()
+        self.search_dialog = None
+        self.search_query = None
+        self.search_regex = None
+        self.search_matches = []
+        self.search_current = None
+        self.search_find_pending = False
+        self.search_update_id = None
+        self.search_highlight_id = None
+        self.search_highlighted_lines = None
+        self.replace_in_progress = False
+        self.file_search = None
+        self.files_dialog = None
+        self.files_result_paths = {}
+        self.auto_save_id = None
+        self.save_worker = SaveWorker()
+        self.save_worker.start()
+        self.pending_saves = {}
+        self.journal_flush_id = None
+        # Journal writes and fsyncs happen here, never on the UI thread
+        self.journal_writer = JournalWriter()
+        self.journal_writer.start()
+        # Tags that only exist for display and are never saved with a document
+        self.transient_tags = {"sel", "search_highlight"} | set(TOKEN_TAGS)
+        self.highlighter = None
+        self.history_memory_limit = 8 << 20
+        self.history_dialog = None
+        self.journal_running = False
+        # Every tab shares the one Text widget, and with it fonts and tag configs
+        self.documents = []
+        self.document = None
+        self.tab_documents = {}
+        self.follower = None
+        self.follow_max_lines = 10000
+        self.follow_poll_interval = 100
+        self.follow_trimmed = False
+        self.summary_client = None
+        self.summary_panel = None
+        self.summary_results = {}
+        self.summary_scope = None
+        self.summary_update_id = None
+        self.summary_delay = 1500
         
         # Create UI components
         self.create_menu()
         self.create_toolbar()
         self.create_status_bar()
         self.create_text_area()
+        self.add_document()
         self.bind_events()
-        self.load_recent_files()
-        self.start_auto_save()
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_editor)
+        # Paint the window before doing anything that touches the disk
+        self.root.update_idletasks()
+        self.root.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        elapsed = (time.perf_counter() - STARTED) * 1000
+        self.status_bar.config(text=f"Ready in {elapsed:.0f} ms")
+        if os.environ.get("TEXT_EDITOR_DIAGNOSTICS"):
+            self.toggle_diagnostics()
+        self.restore_tabs()
+        if self.auto_save:
+            self.start_journal()
+            self.start_auto_save()
+        self.offer_recovery()
+
+    # The file, history and journal always follow the active tab
+    @property
+    def current_file(self):
+        return self.document.file_path
+
+    @current_file.setter
+    def current_file(self, file_path):
+        self.document.file_path = file_path
+
+    @property
+    def history(self):
+        return self.document.history
+
+    @property
+    def journal(self):
+        return self.document.journal
+
+    def record_history(self, op, start, end, text):
+        self.history.record(op, start, end, text)
+
+    def record_journal(self, op, start, end, text):
+        self.journal.record(op, start, end, text)
 
     def create_menu(self):
         menubar = tk.Menu(self.root)
@@ -46,19 +153,24 @@ class TextEditor:
         file_menu.add_command(label="Open", command=self.open_file, accelerator="Ctrl+O")
         file_menu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         file_menu.add_command(label="Save As", command=self.save_as_file, accelerator="Ctrl+Shift+S")
+        file_menu.add_command(label="Close Tab", command=self.close_document, accelerator="Ctrl+W")
         
         # Recent Files submenu
-        self.recent_menu = tk.Menu(file_menu, tearoff=0)
+        self.recent_menu = tk.Menu(file_menu, tearoff=0, postcommand=self.load_recent_files)
         file_menu.add_cascade(label="Recent Files", menu=self.recent_menu)
         
         file_menu.add_separator()
         file_menu.add_command(label="Print", command=self.print_file, accelerator="Ctrl+P")
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.exit_editor)
         
         # Edit Menu
         edit_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
+        edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
+        edit_menu.add_command(label="Undo History", command=self.show_history_dialog)
+        edit_menu.add_separator()
         edit_menu.add_command(label="Cut", command=lambda: self.text_area.event_generate("<<Cut>>"), accelerator="Ctrl+X")
         edit_menu.add_command(label="Copy", command=lambda: self.text_area.event_generate("<<Copy>>"), accelerator="Ctrl+C")
         edit_menu.add_command(label="Paste", command=lambda: self.text_area.event_generate("<<Paste>>"), accelerator="Ctrl+V")
@@ -67,6 +179,7 @@ class TextEditor:
         edit_menu.add_separator()
         edit_menu.add_command(label="Find", command=self.show_find_dialog, accelerator="Ctrl+F")
         edit_menu.add_command(label="Replace", command=self.show_replace_dialog, accelerator="Ctrl+H")
+        edit_menu.add_command(label="Find in Files", command=self.show_find_in_files, accelerator="Ctrl+Shift+F")
         
         # Format Menu
         format_menu = tk.Menu(menubar, tearoff=0)
@@ -81,11 +194,31 @@ class TextEditor:
         format_menu.add_checkbutton(label="Word Wrap", command=self.toggle_word_wrap)
         format_menu.add_checkbutton(label="Show Line Numbers", command=self.toggle_line_numbers)
         
+        # Syntax highlighting submenu
+        self.syntax_var = tk.StringVar(value="None")
+        syntax_menu = tk.Menu(format_menu, tearoff=0)
+        format_menu.add_cascade(label="Syntax", menu=syntax_menu)
+        for name in ["None"] + list(LEXERS):
+            syntax_menu.add_radiobutton(
+                label=name,
+                value=name,
+                variable=self.syntax_var,
+                command=lambda: self.set_syntax(self.syntax_var.get())
+            )
+        
         # Tools Menu
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_checkbutton(label="Auto-save", command=self.toggle_auto_save)
+        self.follow_var = tk.BooleanVar(value=False)
+        tools_menu.add_checkbutton(label="Follow File", variable=self.follow_var, command=self.toggle_follow)
         tools_menu.add_command(label="Word Count", command=self.show_word_count)
+        self.summary_var = tk.BooleanVar(value=False)
+        tools_menu.add_checkbutton(label="Summarize", variable=self.summary_var, command=self.toggle_summary_panel)
+        tools_menu.add_separator()
+        self.diagnostics_var = tk.BooleanVar(value=False)
+        tools_menu.add_checkbutton(label="Diagnostics", variable=self.diagnostics_var, command=self.toggle_diagnostics)
+        tools_menu.add_command(label="Save Diagnostics Trace", command=self.save_diagnostics_trace)
         
         # Help Menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -108,7 +241,8 @@ class TextEditor:
         self.font_family_combo = ttk.Combobox(
             toolbar,
             textvariable=self.font_family_var,
-            values=sorted(font.families()),
+            values=[self.current_font_family],
+            postcommand=lambda: self.font_family_combo.configure(values=self.font_families()),
             width=15,
             state="readonly"
         )
@@ -145,8 +279,16 @@ class TextEditor:
         ttk.Button(toolbar, text="Replace", command=self.show_replace_dialog).pack(side=tk.LEFT, padx=2)
 
     def create_text_area(self):
+        # The tab pages are empty; switching tabs swaps the text area's content
+        self.tab_bar = ttk.Notebook(self.root, height=0)
+        self.tab_bar.pack(fill=tk.X, padx=5)
+        self.tab_bar.enable_traversal()
+        self.tab_bar.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.tab_bar.bind('<Button-2>', self.on_tab_middle_click)
+        
         text_frame = ttk.Frame(self.root)
         text_frame.pack(expand=True, fill='both', padx=5, pady=5)
+        self.text_frame = text_frame
         
         self.line_numbers = tk.Text(
             text_frame,
@@ -163,7 +305,7 @@ class TextEditor:
         self.text_area = scrolledtext.ScrolledText(
             text_frame,
             wrap=tk.WORD,
-            undo=True,
+            undo=False,
             width=80,
             height=30,
             font=self.current_font
@@ -171,14 +313,30 @@ class TextEditor:
         self.text_area.pack(side=tk.LEFT, expand=True, fill='both')
         
         # Configure tags
-        self.text_area.tag_configure("bold", font=font.Font(family=self.current_font_family, size=self.current_font_size, weight="bold"))
-        self.text_area.tag_configure("italic", font=font.Font(family=self.current_font_family, size=self.current_font_size, slant="italic"))
+        # Created once; update_font reconfigures them and Tk redraws in place
+        self.bold_font = font.Font(family=self.current_font_family, size=self.current_font_size, weight="bold")
+        self.italic_font = font.Font(family=self.current_font_family, size=self.current_font_size, slant="italic")
+        self.text_area.tag_configure("bold", font=self.bold_font)
+        self.text_area.tag_configure("italic", font=self.italic_font)
         self.text_area.tag_configure("underline", underline=True)
+        self.text_area.tag_configure("search_highlight", background="yellow")
+        self.text_area.tag_raise("sel")
+        self.text_area.configure(yscrollcommand=self.on_text_scroll)
+        self.edit_observer = EditObserver(self.text_area)
+        self.edit_observer.add_listener(self.record_history)
+        self.edit_observer.add_listener(self.format_runs.on_edit)
+        self.edit_observer.add_listener(self.apply_format_to_new_text)
         
         # Bind events
         self.text_area.bind('<<Selection>>', self.update_format_buttons)
-        self.text_area.bind('<Key>', lambda e: (self.update_line_numbers(), self.apply_format_to_new_text()))
         self.text_area.bind('<MouseWheel>', self.update_line_numbers)
+        # Tk's own undo stack is off; route its virtual events to our history
+        self.text_area.bind('<<Undo>>', lambda e: (self.undo(), "break")[1])
+        self.text_area.bind('<<Redo>>', lambda e: (self.redo(), "break")[1])
+        # <<Redo>> is Ctrl+Shift+Z outside Windows, and X11 maps Ctrl+Y to paste;
+        # a widget binding runs before the class one, so the menu's Ctrl+Y wins
+        self.text_area.bind('<Control-y>', lambda e: (self.redo(), "break")[1])
+        self.text_area.bind('<Control-Y>', lambda e: (self.redo(), "break")[1])
 
     def create_status_bar(self):
         self.status_bar = ttk.Label(self.root, text="Ready", anchor=tk.W)
@@ -190,6 +348,7 @@ class TextEditor:
         self.root.bind('<Control-o>', lambda e: self.open_file())
         self.root.bind('<Control-s>', lambda e: self.save_file())
         self.root.bind('<Control-Shift-S>', lambda e: self.save_as_file())
+        self.root.bind('<Control-w>', lambda e: self.close_document())
         self.root.bind('<Control-p>', lambda e: self.print_file())
         
         # Edit operations
@@ -204,37 +363,95 @@ class TextEditor:
         self.root.bind('<Control-u>', lambda e: self.toggle_underline())
         self.root.bind('<Control-f>', lambda e: self.show_find_dialog())
         self.root.bind('<Control-h>', lambda e: self.show_replace_dialog())
+        self.root.bind('<Control-Shift-F>', lambda e: self.show_find_in_files())
         self.root.bind('<Control-Shift-C>', lambda e: self.show_color_dialog())
         
-        # Status bar update
-        self.text_area.bind('<Key>', self.update_status)
-        self.text_area.bind('<Button-1>', self.update_status)
-        
-        # Format tracking
-        self.text_area.bind('<Key>', self.apply_format_to_new_text)
-        self.text_area.bind('<Button-1>', self.clear_format_mark)
+        # A widget has one binding per event, so every handler goes through these
+        self.text_area.bind('<Key>', self.on_key)
+        self.text_area.bind('<Button-1>', self.on_click)
+
+    def on_key(self, event=None):
+        self.diagnostics.key_pressed()
+        self.update_line_numbers()
+        self.update_status()
 
-    def save_file(self):
+    def on_click(self, event=None):
+        self.history.break_coalescing()
+        self.clear_format_mark()
+        self.update_status()
+
+    def save_file(self, wait=False):
+        if self.follower is not None:
+            # The buffer only holds the tail of the file
+            self.status_bar.config(text="Stop following the file before saving")
+            return False
         if not self.current_file:
             return self.save_as_file()
-            
-        try:
-            with open(self.current_file, 'w', encoding='utf-8') as file:
-                file.write(self.text_area.get(1.0, tk.END))
-            self.status_bar.config(text=f"Saved: {os.path.basename(self.current_file)}")
-            self.add_recent_file(self.current_file)
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save file: {str(e)}")
+        
+        # Snapshot the buffer here; encoding and writing happen on the save worker
+        path = self.current_file
+        text = self.text_area.get("1.0", "end-1c")
+        if is_rich_path(path):
+            tag_ranges, tag_config = self.snapshot_tags()
+            data = lambda: encode_document(text, tag_ranges, tag_config)
+        else:
+            data = text
+        future = self.save_worker.submit(path, data)
+        self.text_area.edit_modified(False)
+        self.history.mark_saved()
+        self.status_bar.config(text=f"Saving: {os.path.basename(path)}")
+        
+        # Saves coalesced by the worker share a future; report each one once
+        if future not in self.pending_saves:
+            self.pending_saves[future] = path
+            if not wait:
+                self.root.after(50, self._check_save, future)
+        if wait:
+            try:
+                future.result()
+            except Exception:
+                pass
+            return self._save_finished(future)
+        return True
+
+    def _check_save(self, future):
+        if future not in self.pending_saves:
+            return
+        if not future.done():
+            self.root.after(50, self._check_save, future)
+            return
+        self._save_finished(future)
+
+    def _save_finished(self, future):
+        path = self.pending_saves.pop(future, None)
+        error = future.exception()
+        if path is None:
+            return error is None
+        
+        document = self.find_document(path)
+        if error is not None:
+            # Nothing reached the disk, so the buffer still has unsaved changes
+            if document is self.document:
+                self.text_area.edit_modified(True)
+            elif document is not None:
+                document.modified = True
+                self.update_tab(document)
+            messagebox.showerror("Error", f"Could not save file: {str(error)}")
             return False
+        self.status_bar.config(text=f"Saved: {os.path.basename(path)}")
+        self.add_recent_file(path)
+        if document is not None:
+            self.rebase_journal(document)
+        return True
 
     def save_as_file(self):
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
+            filetypes=[("Text Files", "*.txt"), ("Formatted Documents", "*.tdoc"), ("All Files", "*.*")]
         )
         if file_path:
             self.current_file = file_path
+            self.journal.set_file(file_path)
             if self.save_file():
                 self.update_title()
                 return True
@@ -249,52 +466,542 @@ class TextEditor:
             "Do you want to save the current file?"
         )
         if response:
-            return self.save_file()
+            return self.save_file(wait=True)
         elif response is None:
             return False
         return True
 
     def new_file(self):
-        if self.check_save():
-            self.text_area.delete(1.0, tk.END)
-            self.current_file = None
-            self.update_title()
-            self.status_bar.config(text="New file")
+        self.add_document()
+        self.status_bar.config(text="New file")
 
     def open_file(self, file_path=None):
         if not file_path:
             file_path = filedialog.askopenfilename(
                 defaultextension=".txt",
-                filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
+                filetypes=[("Text Files", "*.txt"), ("Formatted Documents", "*.tdoc"), ("All Files", "*.*")]
             )
-            
-        if file_path and self.check_save():
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    self.text_area.delete(1.0, tk.END)
-                    self.text_area.insert(1.0, file.read())
-                self.current_file = file_path
-                self.update_title()
-                self.status_bar.config(text=f"Opened: {os.path.basename(file_path)}")
-                self.add_recent_file(file_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not open file: {str(e)}")
+        if not file_path:
+            return
+
+        document = self.find_document(file_path)
+        if document is not None:
+            self.select_document(document)
+            return
+
+        try:
+            text, tags, tag_config = load_file(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open file: {str(e)}")
+            return
+        # An untouched untitled tab is reused instead of left behind empty
+        if not self.document_is_blank():
+            self.add_document()
+        self.current_file = file_path
+        self.load_buffer(text, tags, tag_config)
+        self.text_area.edit_modified(False)
+        self.history.clear()
+        self.reset_journal(file_path)
+        self.detect_syntax()
+        self.update_title()
+        state = self.update_session(lambda store: store.file_state(file_path))
+        if state:
+            cursor, yview = state
+            self.text_area.mark_set(tk.INSERT, cursor)
+            self.text_area.yview_moveto(yview)
+        self.status_bar.config(text=f"Opened: {os.path.basename(file_path)}")
+        self.add_recent_file(file_path)
+
+    def load_buffer(self, text, tags=None, tag_config=None):
+        with self.edit_observer.suspend():
+            self.text_area.delete("1.0", tk.END)
+            self.text_area.insert("1.0", text)
+        self.apply_tags(tags or {}, tag_config or {})
+
+    def snapshot_tags(self):
+        tag_ranges = {}
+        tag_config = {}
+        for tag in self.text_area.tag_names():
+            if tag in self.transient_tags:
+                continue
+            ranges = self.text_area.tag_ranges(tag)
+            if not ranges:
+                continue
+            tag_ranges[tag] = tuple(map(str, ranges))
+            options = {}
+            for option in ("foreground", "background", "underline", "overstrike"):
+                value = str(self.text_area.tag_cget(tag, option))
+                if value:
+                    options[option] = value
+            if options:
+                tag_config[tag] = options
+        return tag_ranges, tag_config
+
+    def apply_tags(self, tags, tag_config, batch_size=20000):
+        for tag, options in tag_config.items():
+            if tag not in ("bold", "italic"):
+                self.text_area.tag_configure(tag, **options)
+        # One tag_add call covers many ranges at once
+        for tag, indices in tags.items():
+            for i in range(0, len(indices), batch_size * 2):
+                self.text_area.tag_add(tag, *indices[i:i + batch_size * 2])
+        self.text_area.tag_raise("sel")
+
+    def detect_syntax(self):
+        lexer = lexer_for_filename(self.current_file)
+        self.set_syntax(lexer.name if lexer else "None")
+
+    def set_syntax(self, name):
+        self.syntax_var.set(name)
+        if self.highlighter:
+            self.edit_observer.remove_listener(self.highlighter.on_edit)
+            self.highlighter.clear()
+            self.highlighter = None
+        if name in LEXERS:
+            self.highlighter = Highlighter(self.text_area, LEXERS[name]())
+            self.edit_observer.add_listener(self.highlighter.on_edit)
 
     def update_title(self):
         if self.current_file:
             self.root.title(f"Text Editor - {os.path.basename(self.current_file)}")
         else:
             self.root.title("Text Editor - Untitled")
+        self.update_tab(self.document)
+
+    def update_tab(self, document):
+        self.tab_bar.tab(document.tab, text=document.title)
+
+    def find_document(self, file_path):
+        for document in self.documents:
+            if document.same_file(file_path):
+                return document
+        return None
+
+    def document_is_blank(self):
+        return (self.current_file is None and not self.text_area.edit_modified()
+                and not self.history.size() and self.text_area.compare("end-1c", "==", "1.0"))
+
+    def add_document(self, file_path=None, activate=True):
+        """Open a new tab, empty or (when not activated) parked on file_path"""
+        document = Document(file_path, history_memory=self.history_memory_limit, journal_writer=self.journal_writer)
+        document.tab = ttk.Frame(self.tab_bar, height=0)
+        self.tab_documents[str(document.tab)] = document
+        self.documents.append(document)
+        self.tab_bar.add(document.tab, text=document.title)
+        if activate:
+            self.select_document(document)
+            self.reset_journal()
+        else:
+            # Nothing is read until the tab is first selected
+            lexer = lexer_for_filename(file_path)
+            document.syntax = lexer.name if lexer else "None"
+            document.park(False, {}, {}, lambda: "")
+        return document
+
+    def select_document(self, document):
+        self.tab_bar.select(document.tab)
+        self.activate_document(document)
+
+    def on_tab_changed(self, event=None):
+        selected = self.tab_bar.select()
+        if selected:
+            self.activate_document(self.tab_documents[str(selected)])
+
+    def on_tab_middle_click(self, event):
+        try:
+            index = self.tab_bar.index(f"@{event.x},{event.y}")
+        except tk.TclError:
+            return
+        self.close_document(self.documents[index])
+
+    def park_document(self, document):
+        tag_ranges, tag_config = self.snapshot_tags()
+        document.cursor = self.text_area.index(tk.INSERT)
+        document.yview = self.text_area.yview()[0]
+        document.syntax = self.syntax_var.get()
+        # A file still being written cannot be read back yet
+        reloadable = document.file_path not in self.pending_saves.values()
+        document.park(self.text_area.edit_modified(), tag_ranges, tag_config,
+                      lambda: self.text_area.get("1.0", "end-1c"), reloadable)
+        self.update_journal(document.journal.flush)
+        self.update_tab(document)
+        if document.file_path:
+            state = (document.file_path, document.cursor, document.yview)
+            self.update_session(lambda store: store.save_file_states([state]))
+
+    def activate_document(self, document):
+        if document is self.document:
+            return
+        if self.replace_in_progress:
+            # The pending replacements belong to the current buffer
+            self.tab_bar.select(self.document.tab)
+            return
+        if self.document is not None:
+            self.stop_follow(reload=False)
+            try:
+                self.park_document(self.document)
+            except Exception as e:
+                # Stay on the current document so the tab bar matches the buffer
+                messagebox.showerror("Error", f"Could not switch documents: {str(e)}")
+                self.tab_bar.select(self.document.tab)
+                return
+        self.document = document
+        self.clear_format_mark()
+        self.start_search_reset()
+
+        try:
+            text, tags, tag_config = document.unpark()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not reload file: {str(e)}")
+            text, tags, tag_config = "", {}, {}
+            document.history.clear()
+        self.load_buffer(text, tags, tag_config)
+        self.text_area.edit_modified(document.modified)
+        # While active, the widget's modified flag is the one that counts
+        document.modified = False
+        self.text_area.mark_set(tk.INSERT, document.cursor)
+        self.text_area.yview_moveto(document.yview)
+        self.text_area.see(tk.INSERT)
+        self.set_syntax(document.syntax)
+
+        self.update_title()
+        self.update_line_numbers()
+        self.update_status()
+        self.refresh_history_dialog()
+        if self.search_dialog is not None:
+            self.schedule_search()
+        if self.summary_var.get():
+            self.summarize()
+
+    def close_document(self, document=None):
+        document = document or self.document
+        if self.replace_in_progress:
+            return
+        self.select_document(document)
+        if not self.check_save():
+            return
+        self.stop_follow(reload=False)
+        self.update_journal(document.journal.discard)
+        if document.file_path:
+            state = (document.file_path, self.text_area.index(tk.INSERT), self.text_area.yview()[0])
+            self.update_session(lambda store: store.save_file_states([state]))
+        self.remove_document(document)
+
+    def remove_document(self, document):
+        document.history.clear()
+        index = self.documents.index(document)
+        self.documents.remove(document)
+        del self.tab_documents[str(document.tab)]
+        active = document is self.document
+        if active:
+            self.document = None
+        self.tab_bar.forget(document.tab)
+        document.tab.destroy()
+        if not self.documents:
+            self.add_document()
+        elif active:
+            self.select_document(self.documents[min(index, len(self.documents) - 1)])
+
+    def restore_tabs(self):
+        """Reopen the files that were open when the editor last exited"""
+        paths, active = self.update_session(lambda store: store.open_tabs()) or ([], 0)
+        restored = []
+        for index, path in enumerate(paths):
+            if not os.path.isfile(path) or self.find_document(path):
+                continue
+            document = self.add_document(path, activate=False)
+            state = self.update_session(lambda store: store.file_state(path))
+            if state:
+                document.cursor, document.yview = state
+            if index == active or not restored:
+                target = document
+            restored.append(document)
+        if not restored:
+            return
+        # Drop the empty tab the editor started with
+        blank = self.document if self.document_is_blank() else None
+        self.select_document(target)
+        if blank is not None:
+            self.update_journal(blank.journal.discard)
+            self.remove_document(blank)
+
+    def save_session(self):
+        self.document.cursor = self.text_area.index(tk.INSERT)
+        self.document.yview = self.text_area.yview()[0]
+        files = [document for document in self.documents if document.file_path]
+        states = [(document.file_path, document.cursor, document.yview) for document in files]
+        active = files.index(self.document) if self.document in files else 0
+        self.update_session(lambda store: store.save_file_states(states))
+        self.update_session(lambda store: store.save_open_tabs([document.file_path for document in files], active))
+
+    def session_store(self):
+        """The session database, opened (and migrated) on first use"""
+        if self.session is None:
+            self.session = SessionStore()
+            self.session.migrate_recent_files("recent_files.json")
+        return self.session
+
+    def update_session(self, action):
+        # Losing session state is not worth interrupting the user for
+        try:
+            return action(self.session_store())
+        except (sqlite3.Error, OSError) as e:
+            self.status_bar.config(text=f"Session store unavailable: {e}")
+            return None
 
     def start_auto_save(self):
-        if self.auto_save and self.current_file:
-            self.save_file()
-        self.root.after(self.auto_save_interval, self.start_auto_save)
+        # Auto-save keeps the recovery journal compact; the user's file is only
+        # written on an explicit save
+        self.auto_save_id = None
+        if self.auto_save and self.journal.size > self.journal_compact_size:
+            self.update_journal(self.journal.compact, self.text_area.get("1.0", "end-1c"))
+        if self.auto_save:
+            self.auto_save_id = self.root.after(self.auto_save_interval, self.start_auto_save)
 
     def toggle_auto_save(self):
         self.auto_save = not self.auto_save
+        if self.auto_save_id:
+            self.root.after_cancel(self.auto_save_id)
+            self.auto_save_id = None
         if self.auto_save:
-            self.start_auto_save()
+            self.start_journal()
+            self.auto_save_id = self.root.after(self.auto_save_interval, self.start_auto_save)
+        else:
+            self.stop_journal()
+
+    def start_journal(self):
+        self.journal_running = True
+        if self.text_area.edit_modified():
+            self.update_journal(self.journal.reset, self.current_file, base="snapshot",
+                                text=self.text_area.get("1.0", "end-1c"))
+        else:
+            self.reset_journal(self.current_file)
+        for document in self.documents:
+            if document is self.document:
+                continue
+            if document.modified:
+                self.update_journal(document.journal.reset, document.file_path, base="snapshot",
+                                    text=document.text())
+            else:
+                self.update_journal(document.journal.reset, document.file_path,
+                                    base="file" if document.file_path else "empty")
+        self.edit_observer.add_listener(self.record_journal)
+        self.flush_journal()
+
+    def stop_journal(self):
+        self.journal_running = False
+        self.edit_observer.remove_listener(self.record_journal)
+        if self.journal_flush_id:
+            self.root.after_cancel(self.journal_flush_id)
+            self.journal_flush_id = None
+        for document in self.documents:
+            self.update_journal(document.journal.discard)
+
+    def update_journal(self, action, *args, **kwargs):
+        try:
+            action(*args, **kwargs)
+        except OSError as e:
+            self.status_bar.config(text=f"Recovery journal unavailable: {e}")
+
+    def reset_journal(self, file_path=None):
+        if self.journal_running:
+            self.update_journal(self.journal.reset, file_path, base="file" if file_path else "empty")
+
+    def rebase_journal(self, document=None):
+        # Edits made while the save was in flight are not in the file yet
+        document = document or self.document
+        if not self.journal_running:
+            return
+        if document is not self.document:
+            text, modified = document.text, document.modified
+        else:
+            text, modified = lambda: self.text_area.get("1.0", "end-1c"), self.text_area.edit_modified()
+        if modified:
+            self.update_journal(document.journal.compact, text())
+        else:
+            self.update_journal(document.journal.reset, document.file_path,
+                                base="file" if document.file_path else "empty")
+
+    def flush_journal(self):
+        self.journal_flush_id = None
+        self.update_journal(self.journal.flush)
+        error = self.journal_writer.take_error()
+        if error is not None:
+            self.status_bar.config(text=f"Recovery journal unavailable: {error}")
+        self.journal_flush_id = self.root.after(self.journal_flush_interval, self.flush_journal)
+
+    def offer_recovery(self):
+        for session in find_sessions():
+            name = os.path.basename(session.file_path) if session.file_path else "Untitled"
+            when = datetime.fromtimestamp(session.updated).strftime('%Y-%m-%d %H:%M')
+            message = f"Unsaved changes to {name} from {when} were found.\n\nRestore them?"
+            if session.base_changed():
+                message += "\n\nThe file has changed on disk since, so the result may be inaccurate."
+            response = messagebox.askyesnocancel("Recover Unsaved Work", message)
+            if response is None:
+                return
+            if response:
+                self.restore_session(session)
+                continue
+            session.discard()
+
+    def restore_session(self, session):
+        if not self.document_is_blank():
+            self.add_document()
+        try:
+            with self.edit_observer.suspend():
+                self.text_area.delete("1.0", tk.END)
+                self.text_area.insert("1.0", session.base_text())
+                for op, start, end, text in session.records():
+                    if op == "insert":
+                        self.text_area.insert(start, text)
+                    else:
+                        self.text_area.delete(start, end)
+        except (OSError, ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", f"Could not recover session: {str(e)}")
+            return
+        
+        self.current_file = session.file_path
+        self.history.clear()
+        self.update_title()
+        self.detect_syntax()
+        self.text_area.edit_modified(True)
+        if self.journal_running:
+            self.update_journal(self.journal.reset, self.current_file, base="snapshot",
+                                text=self.text_area.get("1.0", "end-1c"))
+        session.discard()
+        self.status_bar.config(text="Recovered unsaved changes")
+
+    def exit_editor(self):
+        self.stop_follow(reload=False)
+        if self.summary_client is not None:
+            self.summary_client.close()
+        # Let queued background saves reach the disk before quitting
+        self.save_worker.flush(timeout=10)
+        self.save_session()
+        # Unsaved work stays in the journal so the next start can offer it back
+        for document in self.documents:
+            modified = self.text_area.edit_modified() if document is self.document else document.modified
+            self.update_journal(document.journal.close if modified else document.journal.discard)
+        self.journal_writer.flush(timeout=10)
+        self.root.quit()
+
+    def toggle_follow(self):
+        if self.follower is not None:
+            self.stop_follow()
+        else:
+            self.start_follow()
+
+    def start_follow(self):
+        path = self.current_file
+        self.follow_var.set(False)
+        if not path or is_rich_path(path):
+            messagebox.showinfo("Follow File", "Only a plain text file on disk can be followed")
+            return
+        if self.text_area.edit_modified():
+            messagebox.showinfo("Follow File", "Save your changes before following the file")
+            return
+        # Only needed for following, so kept off the startup path
+        from tail import FileFollower, read_tail
+        try:
+            text, size = read_tail(path, self.follow_max_lines)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not follow file: {str(e)}")
+            return
+        
+        self.clear_format_mark()
+        self.load_buffer(text)
+        self.text_area.edit_modified(False)
+        self.history.clear()
+        # The tail shown is not the file; nothing is journaled until following stops
+        self.reset_journal(path)
+        self.set_syntax(self.syntax_var.get())
+        self.follow_trimmed = len(text.encode('utf-8')) < size
+        # Appended text bypasses the history and journal, so keep the user out
+        self.text_area.configure(state="disabled")
+        self.text_area.see(tk.END)
+        self.update_line_numbers()
+        
+        self.follower = FileFollower(path, offset=size)
+        self.follower.start()
+        self.follow_var.set(True)
+        self.status_bar.config(text=f"Following: {os.path.basename(path)}")
+        self.root.after(self.follow_poll_interval, self._poll_follow, self.follower)
+
+    def stop_follow(self, reload=True):
+        if self.follower is None:
+            return
+        self.follower.cancel()
+        self.follower = None
+        self.follow_var.set(False)
+        self.text_area.configure(state="normal")
+        if reload and self.follow_trimmed:
+            # Go back to editing the whole file, not just the tail that was shown
+            try:
+                text, tags, tag_config = load_file(self.current_file)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not reload file: {str(e)}")
+                text, tags, tag_config = "", {}, {}
+                self.current_file = None
+            self.load_buffer(text, tags, tag_config)
+            self.text_area.edit_modified(False)
+            self.set_syntax(self.syntax_var.get())
+            self.text_area.see(tk.END)
+            self.update_title()
+            self.update_line_numbers()
+        self.follow_trimmed = False
+        self.history.clear()
+        self.reset_journal(self.current_file)
+
+    def _poll_follow(self, follower):
+        if follower is not self.follower:
+            return
+        
+        chunks = []
+        finished = False
+        while True:
+            try:
+                chunk = follower.results.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                finished = True
+                break
+            chunks.append(chunk)
+        
+        if chunks:
+            self.append_followed("".join(chunks))
+        if finished:
+            self.stop_follow()
+            if follower.error is not None:
+                messagebox.showerror("Error", f"Stopped following file: {str(follower.error)}")
+            return
+        self.root.after(self.follow_poll_interval, self._poll_follow, follower)
+
+    def append_followed(self, text):
+        # Only keep scrolling if the user has not scrolled away from the end
+        pinned = self.text_area.yview()[1] >= 1.0
+        start = self.text_area.index("end-1c")
+        self.text_area.configure(state="normal")
+        try:
+            with self.edit_observer.suspend():
+                self.text_area.insert(tk.END, text)
+                end = self.text_area.index("end-1c")
+                excess = int(end.split('.')[0]) - self.follow_max_lines
+                if excess > 0:
+                    self.text_area.delete("1.0", f"{excess + 1}.0")
+                    self.follow_trimmed = True
+        finally:
+            self.text_area.configure(state="disabled")
+        self.text_area.edit_modified(False)
+        if self.highlighter:
+            self.highlighter.on_edit("insert", start, end, text)
+            if excess > 0:
+                self.highlighter.on_edit("delete", "1.0", f"{excess + 1}.0", "")
+        if pinned:
+            self.text_area.see(tk.END)
+        self.update_line_numbers()
+        self.update_status()
 
     def print_file(self):
         try:
@@ -329,10 +1036,7 @@ class TextEditor:
             self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
             
     def show_word_count(self):
-        text = self.text_area.get("1.0", tk.END)
-        words = len(text.split())
-        chars = len(text)
-        lines = text.count('\n')
+        lines, words, chars = text_stats(self.text_area.get("1.0", "end-1c"))
         
         messagebox.showinfo(
             "Word Count",
@@ -340,16 +1044,12 @@ class TextEditor:
         )
         
     def load_recent_files(self):
-        try:
-            with open("recent_files.json", "r", encoding='utf-8') as f:
-                self.recent_files = json.load(f)
-                self.update_recent_menu()
-        except:
-            self.recent_files = []
-            
-    def save_recent_files(self):
-        with open("recent_files.json", "w", encoding='utf-8') as f:
-            json.dump(self.recent_files, f)
+        # Read the first time the menu opens or a file is added, not at startup
+        if self.recent_files_loaded:
+            return
+        self.recent_files_loaded = True
+        self.recent_files = self.update_session(lambda store: store.recent_files(self.max_recent_files)) or []
+        self.update_recent_menu()
             
     def update_recent_menu(self):
         self.recent_menu.delete(0, tk.END)
@@ -360,12 +1060,13 @@ class TextEditor:
             )
             
     def add_recent_file(self, file_path):
+        self.load_recent_files()
         if file_path in self.recent_files:
             self.recent_files.remove(file_path)
         self.recent_files.insert(0, file_path)
         self.recent_files = self.recent_files[:self.max_recent_files]
         self.update_recent_menu()
-        self.save_recent_files()
+        self.update_session(lambda store: store.add_recent_file(file_path, self.max_recent_files))
         
     def open_recent_file(self, file_path):
         if os.path.exists(file_path):
@@ -374,109 +1075,669 @@ class TextEditor:
             messagebox.showerror("Error", "File not found")
             self.recent_files.remove(file_path)
             self.update_recent_menu()
-            self.save_recent_files()
+            self.update_session(lambda store: store.remove_recent_file(file_path))
 
     def show_find_dialog(self):
-        dialog = tk.Toplevel(self.root)
-        dialog.title("Find")
-        dialog.geometry("300x150")
+        dialog = self._create_search_dialog("Find")
         
-        ttk.Label(dialog, text="Find:").pack(pady=5)
-        find_var = tk.StringVar()
-        find_entry = ttk.Entry(dialog, textvariable=find_var)
-        find_entry.pack(pady=5)
+        ttk.Button(dialog, text="Find Next", command=self.find_next).pack(pady=10)
         
-        case_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(dialog, text="Case sensitive", variable=case_var).pack()
+    def show_replace_dialog(self):
+        dialog = self._create_search_dialog("Replace", with_replace=True)
         
-        def find_next():
-            search_text = find_var.get()
-            if not search_text:
-                return
-                
-            start_pos = self.text_area.index(tk.INSERT)
-            
-            if case_var.get():
-                pos = self.text_area.search(search_text, start_pos)
-            else:
-                pos = self.text_area.search(search_text, start_pos, nocase=True)
-                
-            if pos:
-                end_pos = f"{pos}+{len(search_text)}c"
-                self.text_area.tag_remove("sel", "1.0", tk.END)
-                self.text_area.tag_add("sel", pos, end_pos)
-                self.text_area.see(pos)
-            else:
-                messagebox.showinfo("Find", "Text not found")
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(pady=10)
         
-        ttk.Button(dialog, text="Find Next", command=find_next).pack(pady=10)
+        ttk.Button(button_frame, text="Find Next", command=self.find_next).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Replace", command=self.replace_selection).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Replace All", command=self.replace_all).pack(side=tk.LEFT, padx=5)
+
+    def _create_search_dialog(self, title, with_replace=False):
+        self.close_search_dialog()
         
-    def show_replace_dialog(self):
         dialog = tk.Toplevel(self.root)
-        dialog.title("Replace")
-        dialog.geometry("300x200")
+        dialog.title(title)
+        dialog.geometry("320x290" if with_replace else "320x240")
+        dialog.protocol("WM_DELETE_WINDOW", self.close_search_dialog)
+        self.search_dialog = dialog
         
         ttk.Label(dialog, text="Find:").pack(pady=5)
-        find_var = tk.StringVar()
-        find_entry = ttk.Entry(dialog, textvariable=find_var)
+        self.find_var = tk.StringVar()
+        find_entry = ttk.Entry(dialog, textvariable=self.find_var)
         find_entry.pack(pady=5)
+        find_entry.focus_set()
         
-        ttk.Label(dialog, text="Replace with:").pack(pady=5)
-        replace_var = tk.StringVar()
-        replace_entry = ttk.Entry(dialog, textvariable=replace_var)
-        replace_entry.pack(pady=5)
+        if with_replace:
+            ttk.Label(dialog, text="Replace with:").pack(pady=5)
+            self.replace_var = tk.StringVar()
+            ttk.Entry(dialog, textvariable=self.replace_var).pack(pady=5)
         
-        case_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(dialog, text="Case sensitive", variable=case_var).pack()
+        options = ttk.Frame(dialog)
+        options.pack()
+        self.case_var = tk.BooleanVar(value=False)
+        self.regex_var = tk.BooleanVar(value=False)
+        self.whole_word_var = tk.BooleanVar(value=False)
+        self.highlight_all_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options, text="Case sensitive", variable=self.case_var).grid(row=0, column=0, sticky=tk.W)
+        ttk.Checkbutton(options, text="Regex", variable=self.regex_var).grid(row=0, column=1, sticky=tk.W)
+        ttk.Checkbutton(options, text="Whole word", variable=self.whole_word_var).grid(row=1, column=0, sticky=tk.W)
+        ttk.Checkbutton(options, text="Highlight all", variable=self.highlight_all_var).grid(row=1, column=1, sticky=tk.W)
         
-        def find_next():
-            search_text = find_var.get()
-            if not search_text:
-                return
-                
-            start_pos = self.text_area.index(tk.INSERT)
-            
-            if case_var.get():
-                pos = self.text_area.search(search_text, start_pos)
-            else:
-                pos = self.text_area.search(search_text, start_pos, nocase=True)
-                
-            if pos:
-                end_pos = f"{pos}+{len(search_text)}c"
-                self.text_area.tag_remove("sel", "1.0", tk.END)
-                self.text_area.tag_add("sel", pos, end_pos)
-                self.text_area.see(pos)
+        self.match_count_label = ttk.Label(dialog, text="")
+        self.match_count_label.pack()
+        
+        # Restart the search whenever the query or its options change
+        for var in (self.find_var, self.case_var, self.regex_var, self.whole_word_var):
+            var.trace_add('write', self.schedule_search)
+        self.highlight_all_var.trace_add('write', lambda *args: self.refresh_search_highlights())
+        
+        return dialog
+
+    def close_search_dialog(self):
+        # The dialog stays up until a running Replace All has been applied
+        if self.replace_in_progress:
+            return
+        if self.search_update_id:
+            self.root.after_cancel(self.search_update_id)
+            self.search_update_id = None
+        self.start_search_reset()
+        if self.search_dialog is not None:
+            self.search_dialog.destroy()
+            self.search_dialog = None
+
+    def current_search_query(self):
+        return SearchQuery(
+            self.find_var.get(),
+            regex=self.regex_var.get(),
+            case_sensitive=self.case_var.get(),
+            whole_word=self.whole_word_var.get()
+        )
+
+    def schedule_search(self, *args):
+        if self.search_update_id:
+            self.root.after_cancel(self.search_update_id)
+        self.search_update_id = self.root.after(150, self.start_search)
+
+    def start_search(self, find_after=False):
+        self.search_update_id = None
+        if self.replace_in_progress:
+            return
+        self.start_search_reset()
+        self.search_find_pending = find_after
+        
+        query = self.current_search_query()
+        if not query.pattern:
+            self.match_count_label.config(text="")
+            return
+        
+        try:
+            regex = query.compile()
+            job = self.search_engine.start(self.text_area.get("1.0", "end-1c"), query)
+        except re.error as e:
+            self.match_count_label.config(text=f"Invalid pattern: {e}")
+            return
+        
+        self.search_query = query
+        self.search_regex = regex
+        self.match_count_label.config(text="Searching...")
+        self.root.after(30, self._poll_search, job)
+
+    def _poll_search(self, job):
+        if job is not self.search_engine.job:
+            return
+        
+        finished = False
+        for _ in range(20):
+            try:
+                batch = job.results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            self.search_matches.extend(batch)
+        
+        self.refresh_search_highlights()
+        self.update_match_count(finished)
+        if self.search_find_pending and (self.search_matches or finished):
+            self.search_find_pending = False
+            self.find_next(verify=False)
+        
+        if not finished:
+            self.root.after(30, self._poll_search, job)
+
+    def update_match_count(self, finished=True):
+        total = len(self.search_matches)
+        suffix = "" if finished else "+"
+        if not total and finished:
+            text = "No matches"
+        elif self.search_current is not None:
+            text = f"{self.search_current + 1} of {total}{suffix}"
+        else:
+            text = f"{total}{suffix} matches"
+        self.match_count_label.config(text=text)
+
+    def find_next(self, verify=True):
+        query = self.current_search_query()
+        if not query.pattern:
+            return
+        
+        if query != self.search_query:
+            self.start_search(find_after=True)
+            return
+        
+        job = self.search_engine.job
+        searching = job is not None and not job.finished
+        if not self.search_matches:
+            if searching:
+                self.search_find_pending = True
             else:
                 messagebox.showinfo("Find", "Text not found")
+            return
         
-        def replace():
-            if self.text_area.tag_ranges("sel"):
-                self.text_area.delete("sel.first", "sel.last")
-                self.text_area.insert("sel.first", replace_var.get())
-                find_next()
+        line, col = map(int, self.text_area.index(tk.INSERT).split('.'))
+        pos = bisect_left(self.search_matches, (line, col))
+        if pos == len(self.search_matches):
+            pos = 0
+        start_line, start_col, end_line, end_col = self.search_matches[pos]
+        start = f"{start_line}.{start_col}"
+        end = f"{end_line}.{end_col}"
+        
+        # The buffer may have been edited since the snapshot was taken
+        if verify and self.match_in_context(self.search_regex, start, end) is None:
+            self.start_search(find_after=True)
+            return
+        
+        self.search_current = pos
+        self.text_area.tag_remove("sel", "1.0", tk.END)
+        self.text_area.tag_add("sel", start, end)
+        self.text_area.mark_set(tk.INSERT, end)
+        self.text_area.see(start)
+        self.update_match_count(not searching)
+
+    def match_in_context(self, regex, start, end):
+        """Match regex at start, ending exactly at end, or return None.
+
+        The lines around the span are included so anchors, word boundaries
+        and lookaround see the same text the search did.
+        """
+        before = self.text_area.get(f"{start} -1 lines linestart", start)
+        selected = self.text_area.get(start, end)
+        after = self.text_area.get(end, f"{end} +1 lines lineend")
+        match = regex.match(before + selected + after, len(before))
+        if match is None or match.end() != len(before) + len(selected):
+            return None
+        return match
+
+    def replace_selection(self):
+        query = self.current_search_query()
+        if not query.pattern or self.replace_in_progress:
+            return
+        try:
+            regex = query.compile()
+        except re.error as e:
+            self.match_count_label.config(text=f"Invalid pattern: {e}")
+            return
+        
+        match = None
+        if self.text_area.tag_ranges("sel"):
+            match = self.match_in_context(regex, self.text_area.index("sel.first"), self.text_area.index("sel.last"))
+        if match is None:
+            self.find_next()
+            return
+        
+        try:
+            replacement = make_replacer(self.replace_var.get(), query.regex)(match)
+        except (re.error, IndexError) as e:
+            self.match_count_label.config(text=f"Invalid replacement: {e}")
+            return
+        start = self.text_area.index("sel.first")
+        self.history.begin_group("Replace")
+        try:
+            self.text_area.replace("sel.first", "sel.last", replacement)
+        finally:
+            self.history.end_group()
+        self.text_area.mark_set(tk.INSERT, f"{start}+{len(replacement)}c")
+        self.find_next()
+
+    def replace_all(self):
+        query = self.current_search_query()
+        if not query.pattern or self.replace_in_progress:
+            return
+        
+        # Stop the running search; the highlights are stale once we start editing
+        self.start_search_reset()
+        try:
+            job = self.search_engine.start(
+                self.text_area.get("1.0", "end-1c"),
+                query,
+                replacement=self.replace_var.get()
+            )
+        except re.error as e:
+            self.match_count_label.config(text=f"Invalid pattern: {e}")
+            return
+        
+        # Keep the user from editing the buffer until every batch is applied
+        self.replace_in_progress = True
+        self.search_dialog.grab_set()
+        self.match_count_label.config(text="Finding matches...")
+        self.root.after(30, self._poll_replace_all, job, [])
+
+    def _poll_replace_all(self, job, spans):
+        if job is not self.search_engine.job:
+            self._finish_replace_all("Replace cancelled")
+            return
         
-        def replace_all():
-            search_text = find_var.get()
-            if not search_text:
+        while True:
+            try:
+                batch = job.results.get_nowait()
+            except queue.Empty:
+                self.match_count_label.config(text=f"Finding matches... {len(spans)}")
+                self.root.after(30, self._poll_replace_all, job, spans)
                 return
-                
-            text = self.text_area.get("1.0", tk.END)
-            
-            if case_var.get():
-                new_text = text.replace(search_text, replace_var.get())
+            if batch is None:
+                break
+            spans.extend(batch)
+        
+        if job.error is not None:
+            self._finish_replace_all(f"Invalid replacement: {job.error}")
+            return
+        if not spans:
+            self._finish_replace_all("No matches")
+            return
+        
+        # Group every edit into a single undo step
+        self.history.begin_group(f"Replace All ({len(spans)})")
+        self._apply_replacements(spans, len(spans))
+
+    def _apply_replacements(self, spans, total, batch_size=500):
+        # Work from the end of the buffer backwards so earlier spans stay valid
+        for _ in range(min(batch_size, len(spans))):
+            start_line, start_col, end_line, end_col, replacement = spans.pop()
+            self.text_area.replace(f"{start_line}.{start_col}", f"{end_line}.{end_col}", replacement)
+        
+        if spans:
+            done = total - len(spans)
+            self.match_count_label.config(text=f"Replacing... {done} of {total}")
+            self.root.after(1, self._apply_replacements, spans, total, batch_size)
+            return
+        
+        self.history.end_group()
+        self._finish_replace_all(f"Replaced {total} occurrences")
+        self.status_bar.config(text=f"Replaced {total} occurrences")
+
+    def _finish_replace_all(self, message):
+        self.replace_in_progress = False
+        if self.search_dialog is not None:
+            self.search_dialog.grab_release()
+            self.match_count_label.config(text=message)
+
+    def start_search_reset(self):
+        self.search_engine.cancel()
+        self.search_query = None
+        self.search_regex = None
+        self.search_matches = []
+        self.search_current = None
+        self.search_find_pending = False
+        self.refresh_search_highlights()
+
+    def on_text_scroll(self, first, last):
+        self.text_area.vbar.set(first, last)
+        if self.highlighter:
+            self.highlighter.on_scroll()
+        if self.search_matches and not self.search_highlight_id:
+            self.search_highlight_id = self.root.after_idle(self.refresh_search_highlights)
+
+    def refresh_search_highlights(self):
+        self.search_highlight_id = None
+        if self.search_highlighted_lines:
+            first, last = self.search_highlighted_lines
+            self.text_area.tag_remove("search_highlight", f"{first}.0", f"{last + 1}.0")
+            self.search_highlighted_lines = None
+        
+        if not self.search_matches or self.search_dialog is None or not self.highlight_all_var.get():
+            return
+        
+        # Only tag the matches in the visible part of the buffer
+        first = int(self.text_area.index("@0,0").split('.')[0])
+        last = int(self.text_area.index(f"@0,{self.text_area.winfo_height()}").split('.')[0])
+        lo = bisect_left(self.search_matches, (first,))
+        hi = bisect_left(self.search_matches, (last + 1,), lo)
+        indices = []
+        for start_line, start_col, end_line, end_col in self.search_matches[lo:hi]:
+            indices.append(f"{start_line}.{start_col}")
+            indices.append(f"{end_line}.{end_col}")
+            last = max(last, end_line)
+        if indices:
+            self.text_area.tag_add("search_highlight", *indices)
+            self.search_highlighted_lines = (first, last)
+        
+    def show_find_in_files(self):
+        if self.files_dialog is not None:
+            self.files_dialog.lift()
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Find in Files")
+        dialog.geometry("700x450")
+        dialog.protocol("WM_DELETE_WINDOW", self.close_find_in_files)
+        self.files_dialog = dialog
+        
+        form = ttk.Frame(dialog)
+        form.pack(fill=tk.X, padx=5, pady=5)
+        form.columnconfigure(1, weight=1)
+        
+        initial_dir = os.path.dirname(self.current_file) if self.current_file else os.getcwd()
+        self.files_dir_var = tk.StringVar(value=initial_dir)
+        self.files_find_var = tk.StringVar()
+        self.files_include_var = tk.StringVar(value="*")
+        self.files_exclude_var = tk.StringVar(value=".git;__pycache__;node_modules")
+        self.files_case_var = tk.BooleanVar(value=False)
+        self.files_regex_var = tk.BooleanVar(value=False)
+        
+        def browse():
+            directory = filedialog.askdirectory(initialdir=self.files_dir_var.get())
+            if directory:
+                self.files_dir_var.set(directory)
+        
+        rows = [
+            ("Find:", self.files_find_var),
+            ("Directory:", self.files_dir_var),
+            ("Include:", self.files_include_var),
+            ("Exclude:", self.files_exclude_var),
+        ]
+        for row, (label, var) in enumerate(rows):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Entry(form, textvariable=var).grid(row=row, column=1, sticky=tk.EW, pady=2)
+        ttk.Button(form, text="Browse", command=browse).grid(row=1, column=2, padx=5)
+        
+        options = ttk.Frame(dialog)
+        options.pack(fill=tk.X, padx=5)
+        ttk.Checkbutton(options, text="Case sensitive", variable=self.files_case_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(options, text="Regex", variable=self.files_regex_var).pack(side=tk.LEFT, padx=5)
+        ttk.Button(options, text="Search", command=self.start_find_in_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(options, text="Stop", command=self.stop_find_in_files).pack(side=tk.LEFT)
+        self.files_status_label = ttk.Label(options, text="")
+        self.files_status_label.pack(side=tk.LEFT, padx=10)
+        
+        results_frame = ttk.Frame(dialog)
+        results_frame.pack(expand=True, fill='both', padx=5, pady=5)
+        self.files_results = ttk.Treeview(results_frame, columns=("file", "line", "preview"), show="headings")
+        self.files_results.heading("file", text="File")
+        self.files_results.heading("line", text="Line")
+        self.files_results.heading("preview", text="Preview")
+        self.files_results.column("file", width=220)
+        self.files_results.column("line", width=50, anchor=tk.E)
+        self.files_results.column("preview", width=400)
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.files_results.yview)
+        self.files_results.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.files_results.pack(side=tk.LEFT, expand=True, fill='both')
+        self.files_results.bind('<Double-1>', self.open_find_in_files_result)
+        self.files_results.bind('<Return>', self.open_find_in_files_result)
+
+    def close_find_in_files(self):
+        self.stop_find_in_files()
+        if self.files_dialog is not None:
+            self.files_dialog.destroy()
+            self.files_dialog = None
+
+    def start_find_in_files(self):
+        self.stop_find_in_files()
+        self.files_results.delete(*self.files_results.get_children())
+        self.files_result_paths = {}
+        
+        query = SearchQuery(
+            self.files_find_var.get(),
+            regex=self.files_regex_var.get(),
+            case_sensitive=self.files_case_var.get()
+        )
+        directory = self.files_dir_var.get()
+        if not query.pattern:
+            return
+        if not os.path.isdir(directory):
+            self.files_status_label.config(text="Directory not found")
+            return
+        try:
+            regex = query.compile_bytes()
+        except re.error as e:
+            self.files_status_label.config(text=f"Invalid pattern: {e}")
+            return
+        
+        # Only needed for Find in Files, so kept off the startup path
+        from file_search import FileSearch
+        self.file_search = FileSearch(
+            directory,
+            regex,
+            include=self.files_include_var.get(),
+            exclude=self.files_exclude_var.get()
+        )
+        self.file_search.start()
+        self.files_status_label.config(text="Searching...")
+        self.root.after(50, self._poll_find_in_files, self.file_search)
+
+    def stop_find_in_files(self):
+        if self.file_search is not None:
+            self.file_search.cancel()
+            self.file_search = None
+
+    def _poll_find_in_files(self, search):
+        if search is not self.file_search:
+            return
+        
+        finished = False
+        for _ in range(50):
+            try:
+                batch = search.results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            for path, line, preview in batch:
+                label = os.path.relpath(path, search.root_dir)
+                item = self.files_results.insert("", tk.END, values=(label, line, preview))
+                self.files_result_paths[item] = path
+        
+        matches = len(self.files_results.get_children())
+        state = "Done" if finished else "Searching..."
+        self.files_status_label.config(text=f"{state} {matches} matches in {search.files_scanned} files")
+        if finished:
+            self.file_search = None
+        else:
+            self.root.after(50, self._poll_find_in_files, search)
+
+    def open_find_in_files_result(self, event=None):
+        selection = self.files_results.selection()
+        if not selection:
+            return
+        path = self.files_result_paths[selection[0]]
+        line = self.files_results.item(selection[0])["values"][1]
+        
+        if not self.document.same_file(path):
+            self.open_file(path)
+        if self.document.same_file(path):
+            self.text_area.mark_set(tk.INSERT, f"{line}.0")
+            self.text_area.see(tk.INSERT)
+            self.text_area.tag_remove("sel", "1.0", tk.END)
+            self.text_area.tag_add("sel", f"{line}.0", f"{line}.end")
+            self.text_area.focus_set()
+
+    def toggle_summary_panel(self):
+        # The menu's checkbutton has already flipped summary_var
+        if self.summary_var.get():
+            self.show_summary_panel()
+        else:
+            self.hide_summary_panel()
+
+    def show_summary_panel(self):
+        if self.summary_panel is None:
+            self.create_summary_panel()
+        self.summary_panel.pack(side=tk.RIGHT, fill=tk.Y, before=self.text_area.frame)
+        self.summary_var.set(True)
+        self.edit_observer.remove_listener(self.on_summary_edit)
+        self.edit_observer.add_listener(self.on_summary_edit)
+        self.summarize()
+
+    def create_summary_panel(self):
+        panel = ttk.Frame(self.text_frame)
+        header = ttk.Frame(panel)
+        header.pack(fill=tk.X)
+        ttk.Label(header, text="Summary").pack(side=tk.LEFT)
+        ttk.Button(header, text="Close", command=self.hide_summary_panel).pack(side=tk.RIGHT)
+        ttk.Button(header, text="Refresh", command=self.summarize).pack(side=tk.RIGHT, padx=2)
+        self.summary_status = ttk.Label(panel, text="", anchor=tk.W, wraplength=280)
+        self.summary_status.pack(fill=tk.X)
+        self.summary_text = scrolledtext.ScrolledText(panel, wrap=tk.WORD, width=40, state='disabled')
+        self.summary_text.tag_configure("heading", font=self.bold_font)
+        self.summary_text.pack(expand=True, fill='both')
+        self.summary_panel = panel
+
+    def hide_summary_panel(self):
+        if self.summary_update_id:
+            self.root.after_cancel(self.summary_update_id)
+            self.summary_update_id = None
+        self.edit_observer.remove_listener(self.on_summary_edit)
+        if self.summary_client is not None:
+            self.summary_client.cancel()
+        if self.summary_panel is not None:
+            self.summary_panel.pack_forget()
+        self.summary_var.set(False)
+
+    def on_summary_edit(self, op, start, end, text):
+        # Work on the old text is wasted; stop it now and start again once typing pauses
+        if self.summary_client is not None and self.summary_client.pending:
+            self.summary_client.cancel()
+            self.summary_status.config(text="Text changed...")
+        self.schedule_summary()
+
+    def schedule_summary(self):
+        if self.summary_update_id:
+            self.root.after_cancel(self.summary_update_id)
+        self.summary_update_id = self.root.after(self.summary_delay, self.summarize)
+
+    def summarize(self):
+        if self.summary_update_id:
+            self.root.after_cancel(self.summary_update_id)
+            self.summary_update_id = None
+        # The worker gets a snapshot, so editing can carry on while it runs
+        try:
+            text = self.text_area.get(tk.SEL_FIRST, tk.SEL_LAST)
+            self.summary_scope = "selection"
+        except tk.TclError:
+            text = self.text_area.get("1.0", "end-1c")
+            self.summary_scope = "document"
+        if self.summary_client is None:
+            # Only needed for the panel, so kept off the startup path
+            from summarize import SummaryClient
+            self.summary_client = SummaryClient()
+        if not text.strip():
+            self.summary_client.cancel()
+            self.summary_results = {}
+            self.render_summary()
+            self.summary_status.config(text="Nothing to summarize")
+            return
+        self.summary_results = self.summary_client.request(text)
+        self.render_summary()
+        if self.summary_client.pending:
+            self.root.after(100, self._poll_summary, self.summary_client.generation)
+
+    def _poll_summary(self, generation):
+        client = self.summary_client
+        if generation != client.generation:
+            return
+        arrived = client.poll()
+        if arrived or client.error:
+            self.summary_results.update(arrived)
+            self.render_summary()
+        if client.pending:
+            self.root.after(100, self._poll_summary, generation)
+
+    def render_summary(self):
+        client = self.summary_client
+        self.summary_text.configure(state='normal')
+        self.summary_text.delete("1.0", tk.END)
+        for method, label in client.labels:
+            self.summary_text.insert(tk.END, f"{label}\n", "heading")
+            if method in self.summary_results:
+                summary, error = self.summary_results[method]
+                body = f"Failed: {error}" if error else summary or "No summary available"
             else:
-                new_text = re.sub(re.escape(search_text), replace_var.get(), text, flags=re.IGNORECASE)
-            
-            self.text_area.delete("1.0", tk.END)
-            self.text_area.insert("1.0", new_text)
+                body = client.error or "Working..."
+            self.summary_text.insert(tk.END, f"{body}\n\n")
+        self.summary_text.configure(state='disabled')
         
-        button_frame = ttk.Frame(dialog)
-        button_frame.pack(pady=10)
+        if client.error:
+            status = client.error
+        elif client.pending:
+            status = f"Summarizing {self.summary_scope}: {len(self.summary_results)} of {len(client.labels)} done"
+        else:
+            status = f"Summary of {self.summary_scope}"
+        self.summary_status.config(text=status)
+
+    def _apply_history_op(self, op, start, end, text):
+        if op == "insert":
+            self.text_area.insert(start, text)
+        else:
+            self.text_area.delete(start, end)
+
+    def _after_history_move(self, cursor):
+        if cursor:
+            self.text_area.mark_set(tk.INSERT, cursor)
+            self.text_area.see(tk.INSERT)
+        self.text_area.edit_modified(not self.history.at_saved)
+        self.update_line_numbers()
+        self.update_status()
+        self.refresh_history_dialog()
+
+    def undo(self):
+        if self.replace_in_progress:
+            return
+        self._after_history_move(self.history.undo(self._apply_history_op))
+
+    def redo(self):
+        if self.replace_in_progress:
+            return
+        self._after_history_move(self.history.redo(self._apply_history_op))
+
+    def show_history_dialog(self):
+        if self.history_dialog is not None:
+            self.history_dialog.lift()
+            self.refresh_history_dialog()
+            return
         
-        ttk.Button(button_frame, text="Find Next", command=find_next).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Replace", command=replace).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Replace All", command=replace_all).pack(side=tk.LEFT, padx=5)
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Undo History")
+        dialog.geometry("300x400")
+        self.history_dialog = dialog
+        
+        def close():
+            self.history_dialog = None
+            dialog.destroy()
+        
+        def jump(event=None):
+            selection = self.history_list.curselection()
+            if selection and not self.replace_in_progress:
+                self._after_history_move(self.history.goto(selection[0], self._apply_history_op))
         
+        dialog.protocol("WM_DELETE_WINDOW", close)
+        self.history_list = tk.Listbox(dialog, activestyle="none")
+        self.history_list.pack(expand=True, fill='both', padx=5, pady=5)
+        self.history_list.bind('<Double-1>', jump)
+        ttk.Button(dialog, text="Go to State", command=jump).pack(pady=5)
+        self.refresh_history_dialog()
+
+    def refresh_history_dialog(self):
+        if self.history_dialog is None:
+            return
+        self.history_list.delete(0, tk.END)
+        self.history_list.insert(tk.END, "Original", *self.history.labels())
+        # Entries past the current position can still be redone
+        for i in range(self.history.position + 1, self.history.size() + 1):
+            self.history_list.itemconfigure(i, foreground="gray")
+        self.history_list.selection_set(self.history.position)
+        self.history_list.see(self.history.position)
+
     def update_status(self, event=None):
         if self.status_update_id:
             self.root.after_cancel(self.status_update_id)
@@ -486,58 +1747,119 @@ class TextEditor:
         self.status_update_id = None
         cursor_pos = self.text_area.index(tk.INSERT)
         line, col = cursor_pos.split('.')
-        text = self.text_area.get('1.0', 'end-1c')
-        words = len(text.split()) if text else 0
-        chars = len(text)
-        self.status_bar.config(text=f"Line: {line} | Column: {col} | Words: {words} | Chars: {chars}")
-
-    def apply_format_to_new_text(self, event=None):
-        if self.format_start_mark and self.current_format_tags:
-            current_pos = self.text_area.index("insert")
-            for tag in self.current_format_tags:
-                self.text_area.tag_add(tag, self.format_start_mark, current_pos)
+        _, words, chars = text_stats(self.text_area.get('1.0', 'end-1c'))
+        status = f"Line: {line} | Column: {col} | Words: {words} | Chars: {chars}"
+        if self.diagnostics.running:
+            status += f" | {self.diagnostics.summary()}"
+        self.status_bar.config(text=status)
+
+    def toggle_diagnostics(self):
+        if self.diagnostics.running:
+            self.diagnostics.stop()
+            self.status_bar.config(text="Diagnostics stopped")
+        else:
+            self.diagnostics.start()
+            self.status_bar.config(text="Diagnostics running")
+        self.diagnostics_var.set(self.diagnostics.running)
+
+    def save_diagnostics_trace(self):
+        if not self.diagnostics.events:
+            messagebox.showinfo("Diagnostics", "Nothing recorded yet; turn on Tools > Diagnostics first")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome Trace", "*.json"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            self.diagnostics.write_trace(file_path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save trace: {str(e)}")
+            return
+        self.status_bar.config(text=f"Trace saved: {os.path.basename(file_path)}")
+
+    def apply_format_to_new_text(self, op, start, end, text):
+        # Only text typed at the caret picks up the active formatting
+        if op != "insert" or not self.format_start_mark or not self.current_format_tags:
+            return
+        if not self.text_area.compare(end, "==", "insert"):
+            return
+        delta = self.format_runs.extend(self.current_format_tags, start, end)
+        for tag, runs in delta.items():
+            indices = []
+            for (start_line, start_col), (end_line, end_col) in runs:
+                indices.append(f"{start_line}.{start_col}")
+                indices.append(f"{end_line}.{end_col}")
+            self.text_area.tag_add(tag, *indices)
                 
     def clear_format_mark(self, event=None):
         self.format_start_mark = None
         self.current_format_tags.clear()
+        self.format_runs.clear()
+
+    def font_families(self):
+        # Asking Tk for every installed font is slow, so it is done once and on demand
+        if self.font_family_list is None:
+            self.font_family_list = sorted(font.families())
+        return self.font_family_list
 
     def show_font_dialog(self):
+        # Built on first use and hidden, not destroyed, when closed
+        if self.font_dialog is None:
+            self.create_font_dialog()
+        self.font_dialog_family_var.set(self.current_font_family)
+        self.font_dialog_size_var.set(str(self.current_font_size))
+        self.font_dialog.deiconify()
+        self.font_dialog.lift()
+
+    def create_font_dialog(self):
         dialog = tk.Toplevel(self.root)
         dialog.title("Font")
         dialog.geometry("300x200")
+        dialog.protocol("WM_DELETE_WINDOW", dialog.withdraw)
+        self.font_dialog = dialog
         
         ttk.Label(dialog, text="Font Family:").pack(pady=5)
-        font_family_var = tk.StringVar(value=self.current_font_family)
+        self.font_dialog_family_var = tk.StringVar(value=self.current_font_family)
         font_family_combo = ttk.Combobox(
             dialog,
-            textvariable=font_family_var,
-            values=sorted(font.families()),
+            textvariable=self.font_dialog_family_var,
+            postcommand=lambda: font_family_combo.configure(values=self.font_families()),
             state="readonly"
         )
         font_family_combo.pack(pady=5)
         
         ttk.Label(dialog, text="Font Size:").pack(pady=5)
-        font_size_var = tk.StringVar(value=str(self.current_font_size))
+        self.font_dialog_size_var = tk.StringVar(value=str(self.current_font_size))
         font_size_combo = ttk.Combobox(
             dialog,
-            textvariable=font_size_var,
+            textvariable=self.font_dialog_size_var,
             values=["8", "9", "10", "11", "12", "14", "16", "18", "20", "22", "24", "26", "28", "36", "48", "72"],
             state="readonly"
         )
         font_size_combo.pack(pady=5)
         
         def apply_font():
-            self.current_font_family = font_family_var.get()
-            self.current_font_size = int(font_size_var.get())
+            self.current_font_family = self.font_dialog_family_var.get()
+            self.current_font_size = int(self.font_dialog_size_var.get())
             self.update_font()
-            dialog.destroy()
+            dialog.withdraw()
         
         ttk.Button(dialog, text="Apply", command=apply_font).pack(pady=10)
         
     def show_color_dialog(self):
+        if self.color_dialog is None:
+            self.create_color_dialog()
+        self.color_dialog.deiconify()
+        self.color_dialog.lift()
+
+    def create_color_dialog(self):
         dialog = tk.Toplevel(self.root)
         dialog.title("Text Color")
         dialog.geometry("300x200")
+        dialog.protocol("WM_DELETE_WINDOW", dialog.withdraw)
+        self.color_dialog = dialog
         
         colors = ["Black", "Red", "Green", "Blue", "Yellow", "Purple", "Orange"]
         color_var = tk.StringVar(value="Black")
@@ -562,7 +1884,7 @@ class TextEditor:
                 
                 self.text_area.tag_add(color_var.get().lower(), start, end)
                 self.text_area.tag_config(color_var.get().lower(), foreground=color_var.get().lower())
-                dialog.destroy()
+                dialog.withdraw()
             except Exception as e:
                 messagebox.showerror("Error", f"Could apply color: {str(e)}")
         
@@ -577,26 +1899,9 @@ class TextEditor:
         self.update_font()
         
     def update_font(self):
-        new_font = font.Font(
-            family=self.current_font_family,
-            size=self.current_font_size,
-            weight="normal",
-            slant="roman"
-        )
-        
-        self.current_font = new_font
-        self.text_area.configure(font=self.current_font)
-        
-        self.text_area.tag_configure("bold", font=font.Font(
-            family=self.current_font_family,
-            size=self.current_font_size,
-            weight="bold"
-        ))
-        self.text_area.tag_configure("italic", font=font.Font(
-            family=self.current_font_family,
-            size=self.current_font_size,
-            slant="italic"
-        ))
+        # Reconfiguring the named fonts updates the widget and every tag using them
+        for named_font in (self.current_font, self.bold_font, self.italic_font):
+            named_font.configure(family=self.current_font_family, size=self.current_font_size)
         
     def _toggle_tag(self, tag_name, var):
         try:
@@ -605,13 +1910,20 @@ class TextEditor:
                 self.format_start_mark = None
             else:
                 start = end = "insert"
+
+            if start == "insert" and self.format_start_mark:
+                # Already typing with formatting; toggle what is active
+                active = tag_name in self.current_format_tags
+            else:
+                active = tag_name in self.text_area.tag_names(start)
+            if start == "insert":
                 self.format_start_mark = start
 
-            current_tags = self.text_area.tag_names(start)
-            if tag_name in current_tags:
+            if active:
                 self.text_area.tag_remove(tag_name, start, end)
                 var.set(False)
                 self.current_format_tags.discard(tag_name)
+                self.format_runs.clear(tag_name)
             else:
                 self.text_area.tag_add(tag_name, start, end)
                 var.set(True)
@@ -0,0 +1,79 @@
+"""Compare the sentence splitter backends on accuracy and speed.
+
+    python benchmark_splitters.py                 # built-in academic sample
+    python benchmark_splitters.py --gold gold.txt # one gold sentence per line
+
+Accuracy is boundary precision/recall/F1 against the gold sentences;
+throughput is characters per second over --repeat copies of the text.
+"""
+import time
+import argparse
+
+from sentence_splitter import SPLITTERS
+
+SAMPLE = [
+    "Text summarization has been studied extensively since Luhn (1958).",
+    "Smith et al. (2019) report gains of 3.5 ROUGE points over the baseline.",
+    "As shown in Fig. 2, the extractive methods are competitive on short inputs, e.g. abstracts.",
+    "However, they degrade on long documents (cf. Sec. 4.2).",
+    "We follow the setup of J. Doe and use the CNN/DailyMail corpus.",
+    "Table 3 lists the results for each method.",
+    "Is the improvement significant?",
+    "A paired bootstrap test gives p < 0.05 in all cases.",
+    "The code is available online.",
+    "[1] H. P. Luhn. 1958. The automatic creation of literature abstracts.",
+    "[2] R. Mihalcea and P. Tarau. 2004. TextRank: Bringing order into texts.",
+    "Finally, we discuss limitations in Sec. 6.",
+]
+
+
+def boundaries(sentences):
+    """Character offsets (ignoring whitespace) where each sentence ends"""
+    ends = set()
+    position = 0
+    for sentence in sentences:
+        position += len("".join(sentence.split()))
+        ends.add(position)
+    return ends
+
+
+def score(gold, predicted):
+    gold_ends, predicted_ends = boundaries(gold), boundaries(predicted)
+    correct = len(gold_ends & predicted_ends)
+    precision = correct / len(predicted_ends) if predicted_ends else 0.0
+    recall = correct / len(gold_ends) if gold_ends else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentence splitters")
+    parser.add_argument("--gold", help="file with one gold sentence per line")
+    parser.add_argument("--repeat", type=int, default=2000, help="copies of the text for the throughput run")
+    parser.add_argument("--backends", default=",".join(SPLITTERS))
+    args = parser.parse_args()
+
+    if args.gold:
+        with open(args.gold, 'r', encoding='utf-8') as f:
+            gold = [line.strip() for line in f if line.strip()]
+    else:
+        gold = SAMPLE
+    text = " ".join(gold)
+    big_text = " ".join([text] * args.repeat)
+
+    print(f"{'backend':<8} {'precision':>9} {'recall':>7} {'f1':>6} {'chars/s':>12}")
+    for name in args.backends.split(","):
+        try:
+            splitter = SPLITTERS[name.strip()]()
+        except (ImportError, LookupError) as e:
+            print(f"{name:<8} unavailable: {e}")
+            continue
+        precision, recall, f1 = score(gold, splitter.split(text))
+        start = time.perf_counter()
+        splitter.spans(big_text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<8} {precision:9.3f} {recall:7.3f} {f1:6.3f} {len(big_text) / elapsed:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
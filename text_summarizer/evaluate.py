@@ -0,0 +1,219 @@
+"""Score every summarization method against gold summaries.
+
+    python evaluate.py corpus.jsonl                # {"id", "text", "summary"} per line
+    python evaluate.py corpus_dir/                 # name.txt with name.summary.txt
+    python evaluate.py corpus.jsonl --output run.json
+    python evaluate.py corpus.jsonl --compare run.json
+
+Documents are spread over a pool of worker processes, each with its own
+TextSummarizer. For each method the report gives ROUGE-1, ROUGE-2 and
+ROUGE-L F1 next to the time it took per document, so a faster scorer can
+be checked for both speed and quality. --compare counts the documents
+whose summary changed since an earlier --output run. With
+--normalization-cache the tokens the workers normalized are merged into
+that file at the end of the run.
+"""
+import os
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from normalizer import TokenNormalizer
+
+METHODS = {
+    'title': 'get_title_based_summary',
+    'keyword': 'get_keyword_based_summary',
+    'cueword': 'get_cueword_based_summary',
+    'tfidf': 'get_tfidf_based_summary',
+}
+METRICS = ('rouge1', 'rouge2', 'rougeL')
+
+_worker = {}
+
+
+def load_corpus(path):
+    """Return [(id, text, gold summary)] from a JSONL file or a directory of pairs"""
+    documents = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if not name.endswith('.txt') or name.endswith('.summary.txt'):
+                continue
+            doc_id = name[:-len('.txt')]
+            gold_path = os.path.join(path, doc_id + '.summary.txt')
+            if not os.path.exists(gold_path):
+                continue
+            with open(os.path.join(path, name), 'r', encoding='utf-8') as f:
+                text = f.read()
+            with open(gold_path, 'r', encoding='utf-8') as f:
+                documents.append((doc_id, text, f.read()))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    documents.append((str(record.get('id', number)), record['text'], record['summary']))
+    return documents
+
+
+def rouge_tokens(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def ngram_counts(ids, n, vocab_size):
+    """Distinct n-grams of an id array, each packed into one int64, with their counts"""
+    if len(ids) < n:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    codes = np.zeros(len(ids) - n + 1, dtype=np.int64)
+    for k in range(n):
+        codes = codes * vocab_size + ids[k:len(ids) - n + 1 + k]
+    return np.unique(codes, return_counts=True)
+
+
+def ngram_overlap(candidate, reference):
+    """Clipped n-gram matches between two (codes, counts) pairs"""
+    _, candidate_index, reference_index = np.intersect1d(
+        candidate[0], reference[0], assume_unique=True, return_indices=True)
+    return int(np.minimum(candidate[1][candidate_index], reference[1][reference_index]).sum())
+
+
+def lcs_length(a, b):
+    """Longest common subsequence of two id arrays, one numpy pass per row"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return 0
+    row = np.zeros(len(b) + 1, dtype=np.int64)
+    for token in a:
+        # row[j] = max(row[j] above, row[j - 1] left, diagonal + 1 on a match);
+        # taking the "left" term is a running maximum along the row
+        best = np.maximum(row[1:], np.where(b == token, row[:-1] + 1, 0))
+        row[1:] = np.maximum.accumulate(best)
+    return int(row[-1])
+
+
+def f1(matches, candidate_total, reference_total):
+    if not matches:
+        return 0.0
+    precision = matches / candidate_total
+    recall = matches / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge(candidate, reference):
+    """ROUGE-1, ROUGE-2 and ROUGE-L F1 of a candidate summary against a reference"""
+    vocab = {}
+    candidate_ids = np.array([vocab.setdefault(token, len(vocab)) for token in rouge_tokens(candidate)], dtype=np.int64)
+    reference_ids = np.array([vocab.setdefault(token, len(vocab)) for token in rouge_tokens(reference)], dtype=np.int64)
+    vocab_size = max(len(vocab), 1)
+    scores = {}
+    for n in (1, 2):
+        candidate_counts = ngram_counts(candidate_ids, n, vocab_size)
+        reference_counts = ngram_counts(reference_ids, n, vocab_size)
+        scores[f'rouge{n}'] = f1(ngram_overlap(candidate_counts, reference_counts),
+                                 candidate_counts[1].sum(), reference_counts[1].sum())
+    scores['rougeL'] = f1(lcs_length(candidate_ids, reference_ids), len(candidate_ids), len(reference_ids))
+    return scores
+
+
+def _init_worker(sentence_splitter, normalization, normalization_cache, num_sentences, methods):
+    # Imported here so the parent process never loads NLTK or scikit-learn
+    from text_summarizer import TextSummarizer
+    _worker['summarizer'] = TextSummarizer(sentence_splitter, normalization, normalization_cache)
+    _worker['num_sentences'] = num_sentences
+    _worker['methods'] = methods
+
+
+def evaluate_document(document):
+    """Run every method on one document.
+
+    Returns (id, {method: (summary, seconds, scores)}, normalization cache
+    entries the worker added for it).
+    """
+    doc_id, text, gold = document
+    summarizer = _worker['summarizer']
+    results = {}
+    for method in _worker['methods']:
+        start = time.perf_counter()
+        summary = getattr(summarizer, METHODS[method])(text, _worker['num_sentences'])
+        elapsed = time.perf_counter() - start
+        results[method] = (summary, elapsed, rouge(summary, gold))
+    normalizer = summarizer.normalizer
+    return doc_id, results, normalizer.take_new() if normalizer else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the summarization methods with ROUGE")
+    parser.add_argument("corpus", help="JSONL file or directory of name.txt / name.summary.txt pairs")
+    parser.add_argument("--methods", default=",".join(METHODS))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--num-sentences", type=int, default=5)
+    parser.add_argument("--splitter", default='punkt', help="sentence splitter backend")
+    parser.add_argument("--normalization", default=None, help="lower, stem or lemma")
+    parser.add_argument("--normalization-cache", default=None, help="token cache each worker starts from; new tokens are saved back to it")
+    parser.add_argument("--output", help="write per-document summaries and scores as JSON")
+    parser.add_argument("--compare", help="an earlier --output file; report summaries that changed")
+    args = parser.parse_args()
+
+    methods = [method.strip() for method in args.methods.split(",")]
+    unknown = [method for method in methods if method not in METHODS]
+    if unknown:
+        parser.error(f"unknown methods: {', '.join(unknown)}")
+    documents = load_corpus(args.corpus)
+    if not documents:
+        parser.error(f"no documents with gold summaries in {args.corpus}")
+
+    start = time.perf_counter()
+    initargs = (args.splitter, args.normalization, args.normalization_cache, args.num_sentences, methods)
+    workers = args.workers or os.cpu_count() or 1
+    chunksize = max(1, len(documents) // (4 * workers))
+    results = {}
+    new_entries = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+        for doc_id, runs, entries in executor.map(evaluate_document, documents, chunksize=chunksize):
+            results[doc_id] = runs
+            new_entries.update(entries)
+    wall = time.perf_counter() - start
+
+    if args.normalization and args.normalization_cache and new_entries:
+        # One save from the parent, so workers never race on the file
+        normalizer = TokenNormalizer(args.normalization, cache_path=args.normalization_cache)
+        normalizer.update(new_entries)
+        normalizer.save()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)['documents']
+
+    print(f"{len(documents)} documents in {wall:.1f} s")
+    header = f"{'method':<8} " + " ".join(f"{metric:>7}" for metric in METRICS) + f" {'ms/doc':>8} {'p99 ms':>8}"
+    if args.compare:
+        header += f" {'changed':>8}"
+    print(header)
+    for method in methods:
+        runs = [results[doc_id][method] for doc_id, _, _ in documents]
+        times = np.array([elapsed for _, elapsed, _ in runs]) * 1000
+        line = f"{method:<8} " + " ".join(
+            f"{np.mean([scores[metric] for _, _, scores in runs]):7.4f}" for metric in METRICS)
+        line += f" {times.mean():8.2f} {np.percentile(times, 99):8.2f}"
+        if args.compare:
+            changed = sum(1 for doc_id, _, _ in documents
+                          if previous.get(doc_id, {}).get(method, {}).get('summary') != results[doc_id][method][0])
+            line += f" {changed:8d}"
+        print(line)
+
+    if args.output:
+        output = {'documents': {
+            doc_id: {method: {'summary': summary, 'seconds': elapsed, **scores}
+                     for method, (summary, elapsed, scores) in runs.items()}
+            for doc_id, runs in results.items()}}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import re
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+try:
+    # C-backed and incremental; the stdlib parser below is the fallback
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Elements whose text is never part of an abstract or the main content
+SKIPPED_TAGS = {'script', 'style', 'nav', 'header', 'footer', 'aside'}
+
+
+class Site:
+    """Where one site keeps its PDF link, abstract and main content.
+
+    abstract and content are (tag, class) pairs. direct_pdf_url, if given,
+    maps a landing page URL straight to its PDF so the page need not be
+    fetched at all.
+    """
+
+    def __init__(self, abstract=('div', 'abstract'), content=('div', 'content'), direct_pdf_url=None):
+        self.abstract = abstract
+        self.content = content
+        self.direct_pdf_url = direct_pdf_url
+
+    def pdf_url_for(self, url):
+        return self.direct_pdf_url(url) if self.direct_pdf_url else None
+
+
+DEFAULT_SITE = Site()
+SITES = {}
+
+
+def register_site(domain, site):
+    """Use site for pages on domain and its subdomains"""
+    SITES[domain.lower()] = site
+
+
+def site_for(url):
+    host = (urlparse(url).hostname or '').lower()
+    while host:
+        if host in SITES:
+            return SITES[host]
+        host = host.partition('.')[2]
+    return DEFAULT_SITE
+
+
+ACL_ID = re.compile(r'^/([A-Z]\d{2}-\d{4}|\d{4}\.[\w-]+\.\d+)/?$')
+
+
+def _acl_pdf_url(url):
+    parts = urlparse(url)
+    match = ACL_ID.match(parts.path)
+    return parts._replace(path=f'/{match.group(1)}.pdf', query='', fragment='').geturl() if match else None
+
+
+def _arxiv_pdf_url(url):
+    parts = urlparse(url)
+    if not parts.path.startswith('/abs/'):
+        return None
+    return parts._replace(path='/pdf/' + parts.path[len('/abs/'):], query='', fragment='').geturl()
+
+
+register_site('aclanthology.org', Site(direct_pdf_url=_acl_pdf_url))
+register_site('arxiv.org', Site(abstract=('blockquote', 'abstract'), direct_pdf_url=_arxiv_pdf_url))
+
+
+def _is_pdf_link(href):
+    return bool(href) and href.endswith('.pdf')
+
+
+def _has_class(class_attr, name):
+    return name in (class_attr or '').split()
+
+
+class _Capture:
+    """Text collected for one element while the parser is inside it"""
+
+    def __init__(self, kind, tag):
+        self.kind = kind
+        self.tag = tag
+        self.depth = 1
+        self.skipping = 0
+        self.parts = []
+
+
+class StreamingParser(HTMLParser):
+    """Pure-Python incremental scan, used when lxml is not installed"""
+
+    def __init__(self, base_url, site):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.targets = {'abstract': site.abstract, 'content': site.content}
+        self.pdf_url = None
+        self.abstract = None
+        self.content = None
+        self.captures = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'a' and self.pdf_url is None and _is_pdf_link(attrs.get('href')):
+            self.pdf_url = urljoin(self.base_url, attrs['href'])
+        for capture in self.captures:
+            if tag == capture.tag:
+                capture.depth += 1
+            if tag in SKIPPED_TAGS:
+                capture.skipping += 1
+        for kind, (target_tag, target_class) in self.targets.items():
+            if (tag == target_tag and getattr(self, kind) is None and _has_class(attrs.get('class'), target_class)
+                    and not any(capture.kind == kind for capture in self.captures)):
+                self.captures.append(_Capture(kind, tag))
+
+    def handle_endtag(self, tag):
+        for capture in list(self.captures):
+            if tag in SKIPPED_TAGS and capture.skipping:
+                capture.skipping -= 1
+            if tag == capture.tag:
+                capture.depth -= 1
+                if not capture.depth:
+                    self._finish(capture)
+
+    def handle_data(self, data):
+        for capture in self.captures:
+            if not capture.skipping:
+                capture.parts.append(data)
+
+    def close(self):
+        super().close()
+        # Unclosed elements at the end of the page keep what they had
+        for capture in list(self.captures):
+            self._finish(capture)
+
+    def _finish(self, capture):
+        self.captures.remove(capture)
+        setattr(self, capture.kind, ''.join(capture.parts))
+
+
+def _element_text(element):
+    parts = [element.text or '']
+    for child in element:
+        # Comments and processing instructions have a non-string tag
+        if isinstance(child.tag, str) and child.tag not in SKIPPED_TAGS:
+            parts.append(_element_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+class LxmlParser:
+    """Incremental scan on lxml's C HTML parser"""
+
+    def __init__(self, base_url, site):
+        self.base_url = base_url
+        self.targets = {'abstract': site.abstract, 'content': site.content}
+        self.parser = etree.HTMLPullParser(events=('start', 'end'))
+        self.pdf_url = None
+        self.abstract = None
+        self.content = None
+
+    def feed(self, data):
+        self.parser.feed(data)
+        self._read_events()
+
+    def close(self):
+        self.parser.close()
+        self._read_events()
+
+    def _read_events(self):
+        for event, element in self.parser.read_events():
+            tag = element.tag
+            if event == 'start':
+                if tag == 'a' and self.pdf_url is None and _is_pdf_link(element.get('href')):
+                    self.pdf_url = urljoin(self.base_url, element.get('href'))
+                continue
+            for kind, (target_tag, target_class) in self.targets.items():
+                if tag == target_tag and getattr(self, kind) is None and _has_class(element.get('class'), target_class):
+                    setattr(self, kind, _element_text(element))
+
+
+def make_parser(base_url, site):
+    return LxmlParser(base_url, site) if etree is not None else StreamingParser(base_url, site)
+
+
+def iter_text(response, chunk_size=16384):
+    """Decode a streamed requests response chunk by chunk"""
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+class LandingPage:
+    """A paper's landing page, parsed only as far as each question needs.
+
+    Asking for the PDF link stops reading at the first link to a PDF;
+    asking for the abstract afterwards picks up where that left off. The
+    rest of the page is never downloaded or parsed unless the main content
+    is needed.
+    """
+
+    def __init__(self, chunks, base_url, site=None):
+        self.chunks = iter(chunks)
+        self.parser = make_parser(base_url, site or site_for(base_url))
+        self.finished = False
+
+    def _scan_until(self, attribute):
+        while getattr(self.parser, attribute) is None and not self.finished:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.parser.close()
+                self.finished = True
+            else:
+                self.parser.feed(chunk)
+        return getattr(self.parser, attribute)
+
+    def pdf_url(self):
+        return self._scan_until('pdf_url')
+
+    def abstract(self):
+        return self._scan_until('abstract')
+
+    def content(self):
+        return self._scan_until('content')
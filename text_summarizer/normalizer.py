@@ -0,0 +1,112 @@
+import os
+import json
+from collections import OrderedDict
+
+from resources import ensure_nltk_data
+
+MODES = ('lower', 'stem', 'lemma')
+
+
+class TokenNormalizer:
+    """Map tokens to a normal form so "result", "results" and "resulted" match.
+
+    mode is 'lower' (case folding only), 'stem' (Porter stemmer) or 'lemma'
+    (WordNet lemmatizer, trying noun, verb then adjective readings). Every
+    token's normal form is memoized in a bounded LRU cache, since a WordNet
+    lookup costs far more than a dictionary hit and the same few thousand
+    words make up most of any corpus. With cache_path the cache is loaded
+    on start and written back by save(), so batch runs share their work.
+    Worker processes hand their new entries to one owner with take_new(),
+    which merges them with update() and saves once. The lemmatizer or
+    stemmer is only loaded on the first cache miss.
+    """
+
+    def __init__(self, mode='lemma', cache_size=100000, cache_path=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown normalization: {mode!r}; choose from {', '.join(MODES)}")
+        self.mode = mode
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Entries computed since the last take_new()
+        self.new = {}
+        self._normalize = None
+        if cache_path:
+            self.load(cache_path)
+
+    def _backend(self):
+        if self.mode == 'stem':
+            from nltk.stem import PorterStemmer
+            return PorterStemmer().stem
+        if self.mode == 'lemma':
+            ensure_nltk_data('wordnet', 'omw-1.4')
+            from nltk.stem import WordNetLemmatizer
+            lemmatizer = WordNetLemmatizer()
+
+            def lemmatize(token):
+                for pos in ('n', 'v', 'a'):
+                    lemma = lemmatizer.lemmatize(token, pos)
+                    if lemma != token:
+                        return lemma
+                return token
+            return lemmatize
+        return str.lower
+
+    def __call__(self, token):
+        try:
+            normal = self.cache[token]
+        except KeyError:
+            self.misses += 1
+            if self._normalize is None:
+                self._normalize = self._backend()
+            normal = self._normalize(token.lower())
+            self.cache[token] = normal
+            self.new[token] = normal
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return normal
+        self.hits += 1
+        self.cache.move_to_end(token)
+        return normal
+
+    def normalize(self, tokens):
+        return [self(token) for token in tokens]
+
+    def take_new(self):
+        """Return the entries computed since the last call and forget them"""
+        new, self.new = self.new, {}
+        return new
+
+    def update(self, entries):
+        """Add entries computed elsewhere, e.g. by another process"""
+        for token, normal in entries.items():
+            self.cache[token] = normal
+            self.cache.move_to_end(token)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def load(self, path):
+        """Merge a saved cache; entries from another mode are ignored"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(saved, dict) or saved.get('mode') != self.mode:
+            return
+        for token, normal in saved.get('tokens', {}).items():
+            self.cache.setdefault(token, normal)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def save(self, path=None):
+        """Write the cache (least recently used first) for the next run"""
+        path = path or self.cache_path
+        if not path:
+            return
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'mode': self.mode, 'tokens': self.cache}, f)
+        os.replace(temp_path, path)
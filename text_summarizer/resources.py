@@ -0,0 +1,23 @@
+# Where each NLTK package lives once downloaded
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+    'omw-1.4': 'corpora/omw-1.4',
+}
+
+_checked = set()
+
+
+def ensure_nltk_data(*packages):
+    """Download NLTK packages only if they are not installed yet"""
+    import nltk
+    for package in packages:
+        if package in _checked:
+            continue
+        try:
+            nltk.data.find(NLTK_RESOURCES[package])
+        except LookupError:
+            nltk.download(package, quiet=True)
+        _checked.add(package)
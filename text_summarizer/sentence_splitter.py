@@ -0,0 +1,144 @@
+import re
+
+from resources import ensure_nltk_data
+
+# Abbreviations that end in a period without ending the sentence, lowercased
+# and without their final period. Tuned for academic papers; words that are
+# also ordinary English ("no", "app", "st") are left out or listed below.
+ABBREVIATIONS = {
+    'al', 'fig', 'figs', 'eq', 'eqs', 'secs', 'ref', 'refs',
+    'e.g', 'i.e', 'cf', 'vs', 'viz', 'approx', 'resp', 'eds', 'proc', 'conf',
+    'assoc', 'comput', 'ling', 'univ', 'dept',
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'jr', 'sr', 'inc', 'ltd', 'corp',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+}
+# Abbreviations that only count as one before a number, e.g. "No. 5",
+# "pp. 12-19" or "ca. 1900"; "The answer is no. We..." still ends a sentence
+NUMBER_ABBREVIATIONS = {'no', 'nos', 'vol', 'vols', 'p', 'pp', 'sec', 'ch', 'tab', 'ca'}
+# Capitalized words that start a sentence rather than continue a name, so
+# "vitamin A. Then" ends a sentence while "J. Smith" does not
+SENTENCE_STARTERS = {
+    'the', 'this', 'that', 'these', 'those', 'then', 'there', 'it', 'its', 'we', 'our',
+    'they', 'their', 'he', 'she', 'you', 'in', 'on', 'at', 'for', 'from', 'to', 'of',
+    'with', 'by', 'as', 'if', 'when', 'while', 'after', 'before', 'but', 'and', 'or',
+    'so', 'thus', 'however', 'also', 'all', 'each', 'some', 'such', 'here', 'what',
+    'how', 'why', 'is', 'are', 'was', 'were',
+}
+
+# A candidate boundary: terminal punctuation, optional closing quotes or
+# brackets, whitespace, then something that can start a sentence (a capital,
+# a digit, an opening quote/bracket or a numbered reference like "[12]").
+BOUNDARY = re.compile(r'[.!?]+["\'\)\]]*(\s+)(?=["\'\(\[]?[A-Z0-9])')
+# The word right before a period, e.g. "al" in "et al." or "e.g" in "e.g."
+WORD_BEFORE = re.compile(r'(\w+(?:\.\w+)*)\.["\'\)\]]*$')
+# The word right after a boundary
+WORD_AFTER = re.compile(r'["\'\(\[]?(\w+)')
+# An entry of a numbered reference list, e.g. "[12] J. Doe. 2004. Title."
+REFERENCE_START = re.compile(r'\[\d+\]\s')
+# A publication year field of a reference entry, e.g. "2004." or "2004a.",
+# starting after a boundary or ending right before one
+YEAR_AFTER = re.compile(r'\d{4}[a-z]?\.')
+YEAR_BEFORE = re.compile(r'(?<!\d)\d{4}[a-z]?\.["\'\)\]]*$')
+
+
+class RegexSentenceSplitter:
+    """Rule-based sentence splitter built on one compiled regex.
+
+    Boundaries are found with a single regex scan; a candidate is rejected
+    when the period belongs to a known abbreviation ("et al.", "Fig.",
+    "e.g."), a single-letter initial ("J. Smith", but not "vitamin A. Then")
+    or a number prefix ("No. 5", but not "the answer is no. We"). No
+    training data or downloads are needed.
+    """
+
+    name = 'regex'
+
+    def __init__(self, abbreviations=ABBREVIATIONS, number_abbreviations=NUMBER_ABBREVIATIONS):
+        self.abbreviations = abbreviations
+        self.number_abbreviations = number_abbreviations
+
+    def _is_abbreviation(self, text, end, next_start):
+        # Look at a short window before the boundary; words are never that long
+        match = WORD_BEFORE.search(text, max(0, end - 40), end)
+        if not match:
+            return False
+        word = match.group(1).lower()
+        if word in self.abbreviations:
+            return True
+        if word in self.number_abbreviations and text[next_start:next_start + 1].isdigit():
+            return True
+        if len(word) == 1 and word.isalpha() and match.group(1).isupper():
+            following = WORD_AFTER.match(text, next_start)
+            return not (following and following.group(1).lower() in SENTENCE_STARTERS)
+        return False
+
+    @staticmethod
+    def _is_year_field(text, start, end, next_start):
+        # Inside "[1] H. P. Luhn. 1958. Title." the periods around the year
+        # separate fields of one reference entry, not sentences
+        return bool(YEAR_AFTER.match(text, next_start) or YEAR_BEFORE.search(text, max(start, end - 8), end))
+
+    def spans(self, text):
+        """Return (start, end) offsets of each sentence, without surrounding whitespace"""
+        spans = []
+        start = 0
+        reference = REFERENCE_START.match(text, start)
+        for match in BOUNDARY.finditer(text):
+            end = match.start(1)
+            if self._is_abbreviation(text, end, match.end(1)):
+                continue
+            if reference and self._is_year_field(text, start, end, match.end(1)):
+                continue
+            spans.append((start, end))
+            start = match.end(1)
+            reference = REFERENCE_START.match(text, start)
+        spans.append((start, len(text)))
+        spans = [_strip(text, start, end) for start, end in spans]
+        return [(start, end) for start, end in spans if start < end]
+
+    def split(self, text):
+        return [text[start:end] for start, end in self.spans(text)]
+
+
+class PunktSentenceSplitter:
+    """NLTK's Punkt tokenizer (what sent_tokenize uses), behind the same interface"""
+
+    name = 'punkt'
+
+    def __init__(self, language='english'):
+        ensure_nltk_data('punkt', 'punkt_tab')
+        try:
+            # NLTK 3.8.2+ ships Punkt parameters as punkt_tab
+            from nltk.tokenize import PunktTokenizer
+            self.tokenizer = PunktTokenizer(language)
+        except ImportError:
+            import nltk
+            self.tokenizer = nltk.data.load(f'tokenizers/punkt/{language}.pickle')
+
+    def spans(self, text):
+        return list(self.tokenizer.span_tokenize(text))
+
+    def split(self, text):
+        return [text[start:end] for start, end in self.spans(text)]
+
+
+def _strip(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+SPLITTERS = {
+    RegexSentenceSplitter.name: RegexSentenceSplitter,
+    PunktSentenceSplitter.name: PunktSentenceSplitter,
+}
+
+
+def get_splitter(name):
+    """Return a splitter instance for a backend name ("regex" or "punkt")"""
+    try:
+        return SPLITTERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown sentence splitter: {name!r}; choose from {', '.join(SPLITTERS)}")
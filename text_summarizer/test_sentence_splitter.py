@@ -0,0 +1,24 @@
+from benchmark_splitters import SAMPLE, score
+from sentence_splitter import RegexSentenceSplitter
+
+
+def test_regex_splitter_matches_gold_sample():
+    predicted = RegexSentenceSplitter().split(" ".join(SAMPLE))
+    assert score(SAMPLE, predicted)[2] == 1.0
+
+
+def test_year_in_running_text_still_ends_sentence():
+    text = "It was published in 1958. The method is old."
+    assert RegexSentenceSplitter().split(text) == ["It was published in 1958.", "The method is old."]
+
+
+def test_ordinary_words_and_capital_letters_end_sentences():
+    splitter = RegexSentenceSplitter()
+    assert splitter.split("The answer is no. We tried again.") == ["The answer is no.", "We tried again."]
+    assert splitter.split("We built an app. It works.") == ["We built an app.", "It works."]
+    assert splitter.split("See vitamin A. Then eat.") == ["See vitamin A.", "Then eat."]
+
+
+def test_number_prefixes_and_initials_do_not_end_sentences():
+    text = "See No. 5 and pp. 12-19 by J. Smith in Vol. 3. It helps."
+    assert RegexSentenceSplitter().split(text) == ["See No. 5 and pp. 12-19 by J. Smith in Vol. 3.", "It helps."]
@@ -1,10 +1,8 @@
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.probability import FreqDist
 from sklearn.feature_extraction.text import TfidfVectorizer
 import requests
-from bs4 import BeautifulSoup
 import re
 import string
 import PyPDF2
@@ -13,59 +11,73 @@ from datetime import datetime
 import webbrowser
 import os
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('averaged_perceptron_tagger')
-nltk.download('punkt_tab')
-nltk.download('omw-1.4')  # Open Multilingual Wordnet
-nltk.download('wordnet')
+from extractors import LandingPage, iter_text, site_for
+from normalizer import TokenNormalizer
+from resources import ensure_nltk_data
+from sentence_splitter import get_splitter
 
 class TextSummarizer:
-    def __init__(self):
+    def __init__(self, sentence_splitter='punkt', normalization=None, normalization_cache=None):
+        # NLTK data is fetched on first use, and only what the chosen backends need
+        ensure_nltk_data('stopwords')
         self.stop_words = set(stopwords.words('english'))
+        self.splitter = get_splitter(sentence_splitter)
+        # Optional 'lower', 'stem' or 'lemma' normalization for the title and keyword methods
+        self.normalizer = TokenNormalizer(normalization, cache_path=normalization_cache) if normalization else None
+
+    def split_sentences(self, text):
+        """Split text into sentences with the configured backend ('punkt' or 'regex')"""
+        return self.splitter.split(text)
+
+    def tokenize(self, text):
+        """Word tokens of text.
+
+        With Punkt this is plain word_tokenize, as before the splitter was
+        pluggable. The regex backend must work without Punkt's data, so it
+        tokenizes the text as one sentence (preserve_line), which is what
+        word_tokenize does to each sentence anyway.
+        """
+        if self.splitter.name == 'punkt':
+            return word_tokenize(text)
+        return word_tokenize(text, preserve_line=True)
+
+    def normalize(self, tokens):
+        """Apply the configured normalization to a list of tokens"""
+        if self.normalizer is None:
+            return tokens
+        return self.normalizer.normalize(tokens)
         
     def fetch_text_from_url(self, url):
         """Fetch text content from the given URL"""
         try:
-            # First try to get the PDF URL
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find PDF link
-            pdf_link = soup.find('a', href=lambda x: x and x.endswith('.pdf'))
-            if pdf_link:
-                pdf_url = pdf_link['href']
-                if not pdf_url.startswith('http'):
-                    pdf_url = 'https://aclanthology.org' + pdf_url
-                
-                print(f"Found PDF URL: {pdf_url}")
-                pdf_response = requests.get(pdf_url)
-                if pdf_response.headers.get('content-type', '').lower().startswith('application/pdf'):
-                    return self.extract_text_from_pdf(pdf_response.content)
-            
-            # If no PDF found, try to get the abstract
-            abstract_div = soup.find('div', class_='abstract')
-            if abstract_div:
-                text = abstract_div.get_text()
-                # Clean up text
-                text = re.sub(r'\s+', ' ', text)
-                text = text.strip()
-                return text
-            
-            # If no abstract found, try to get the main content
-            content = soup.find('div', class_='content')
-            if content:
-                # Remove unwanted elements
-                for element in content.find_all(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                    element.decompose()
-                
-                text = content.get_text()
-                # Clean up text
-                text = re.sub(r'\s+', ' ', text)
-                text = text.strip()
-                return text
-            
+            site = site_for(url)
+            # Some sites have a predictable PDF address; skip their landing page
+            pdf_url = site.pdf_url_for(url)
+            if pdf_url:
+                text = self.fetch_pdf(pdf_url)
+                if text:
+                    return text
+
+            with requests.get(url, stream=True) as response:
+                # Only as much of the page is read as it takes to find the text
+                page = LandingPage(iter_text(response), response.url, site)
+
+                # First try to get the PDF URL
+                pdf_url = page.pdf_url()
+                if pdf_url:
+                    print(f"Found PDF URL: {pdf_url}")
+                    text = self.fetch_pdf(pdf_url)
+                    if text:
+                        return text
+
+                # If no PDF found, try to get the abstract, then the main content
+                text = page.abstract() or page.content()
+                if text:
+                    # Clean up text
+                    text = re.sub(r'\s+', ' ', text)
+                    text = text.strip()
+                    return text
+
             print("Could not find content")
             return None
                 
@@ -73,6 +85,13 @@ class TextSummarizer:
             print(f"Error fetching URL: {e}")
             return None
 
+    def fetch_pdf(self, pdf_url):
+        """Download a PDF and return its text, or None if the URL is not a PDF"""
+        pdf_response = requests.get(pdf_url)
+        if pdf_response.headers.get('content-type', '').lower().startswith('application/pdf'):
+            return self.extract_text_from_pdf(pdf_response.content)
+        return None
+
     def extract_text_from_pdf(self, pdf_content):
         """Extract text from PDF content"""
         try:
@@ -104,18 +123,18 @@ class TextSummarizer:
 
     def get_title_based_summary(self, text, num_sentences=5):
         """Generate summary based on title similarity"""
-        sentences = sent_tokenize(text)
+        sentences = self.split_sentences(text)
         if not sentences:
             return ""
         
         # Use first sentence as title
         title = sentences[0]
-        title_words = set(word_tokenize(title.lower()))
+        title_words = set(self.normalize(self.tokenize(title.lower())))
         
         # Calculate similarity scores
         sentence_scores = []
         for sentence in sentences[1:]:  # Skip the title sentence
-            sentence_words = set(word_tokenize(sentence.lower()))
+            sentence_words = set(self.normalize(self.tokenize(sentence.lower())))
             similarity = len(title_words.intersection(sentence_words)) / len(title_words)
             sentence_scores.append((sentence, similarity))
         
@@ -128,21 +147,27 @@ class TextSummarizer:
 
     def get_keyword_based_summary(self, text, num_sentences=5):
         """Generate summary based on keyword frequency"""
-        sentences = sent_tokenize(text)
+        sentences = self.split_sentences(text)
         if not sentences:
             return ""
         
+        # Tokenize each sentence once, for scoring below
+        sentence_words = [self.tokenize(sentence.lower()) for sentence in sentences]
+        
         # Get word frequencies
-        words = word_tokenize(text.lower())
+        if self.splitter.name == 'punkt':
+            # Over the whole text, which word_tokenize splits again with Punkt
+            words = self.tokenize(text.lower())
+        else:
+            words = [word for words in sentence_words for word in words]
         words = [word for word in words if word not in self.stop_words and word.isalnum()]
-        freq_dist = FreqDist(words)
+        freq_dist = FreqDist(self.normalize(words))
         
         # Calculate sentence scores based on keyword frequency
         sentence_scores = []
-        for sentence in sentences:
+        for sentence, words in zip(sentences, sentence_words):
             score = 0
-            words = word_tokenize(sentence.lower())
-            for word in words:
+            for word in self.normalize(words):
                 if word in freq_dist:
                     score += freq_dist[word]
             sentence_scores.append((sentence, score))
@@ -162,7 +187,7 @@ class TextSummarizer:
             'result': ['resulted', 'caused', 'led to', 'produced', 'generated']
         }
         
-        sentences = sent_tokenize(text)
+        sentences = self.split_sentences(text)
         if not sentences:
             return ""
         
@@ -170,7 +195,7 @@ class TextSummarizer:
         sentence_scores = []
         for sentence in sentences:
             score = 0
-            words = word_tokenize(sentence.lower())
+            words = self.tokenize(sentence.lower())
             for category in cue_words.values():
                 for cue_word in category:
                     if cue_word in words:
@@ -186,7 +211,7 @@ class TextSummarizer:
 
     def get_tfidf_based_summary(self, text, num_sentences=5):
         """Generate summary based on TF-IDF scores"""
-        sentences = sent_tokenize(text)
+        sentences = self.split_sentences(text)
         if not sentences:
             return ""
         
@@ -213,7 +238,7 @@ class TextSummarizer:
     def format_summary(self, summary):
         """Format the summary to be more readable"""
         # Split into sentences
-        sentences = sent_tokenize(summary)
+        sentences = self.split_sentences(summary)
         
         # Format each sentence
         formatted_sentences = []
@@ -355,7 +380,7 @@ class TextSummarizer:
         if not summary:
             return "<p>No summary available</p>"
             
-        sentences = sent_tokenize(summary)
+        sentences = self.split_sentences(summary)
         formatted_sentences = []
         
         for i, sentence in enumerate(sentences, 1):